@@ -0,0 +1,55 @@
+"""
+Time decoding every method in the decompiled tree into opcodes.
+
+Usage: python benchmarks/decode.py [--repeat N] [--checked]
+
+The JSON files are read once up front (skipping opcodes jpamb does not
+support), so only `jvm.Opcode.from_json` (and the
+types, names and method ids it builds) is measured. `--checked` turns on the
+per-field type checks of the opcodes (like JPAMB_CHECKED=1).
+"""
+
+import argparse
+import json
+import statistics
+from time import perf_counter_ns
+
+from jpamb import jvm, model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--checked", action="store_true")
+    args = parser.parse_args()
+
+    if args.checked:
+        jvm.opcode.CHECKED = True
+
+    bytecode, unsupported = [], 0
+    for file in sorted(model.Suite().decompiledfiles()):
+        with open(file) as fp:
+            for method in json.load(fp).get("methods", []):
+                for op in (method.get("code") or {}).get("bytecode", []):
+                    # only the opcodes jpamb can decode are timed
+                    try:
+                        jvm.Opcode.from_json(op)
+                    except (NotImplementedError, KeyError):
+                        unsupported += 1
+                        continue
+                    bytecode.append(op)
+
+    times = []
+    for _ in range(args.repeat):
+        start = perf_counter_ns()
+        for op in bytecode:
+            jvm.Opcode.from_json(op)
+        times.append(perf_counter_ns() - start)
+
+    per_op = statistics.median(times) / len(bytecode)
+    print(f"{len(bytecode)} opcodes ({unsupported} unsupported skipped), median {statistics.median(times) / 1e6:.2f} ms")
+    print(f"{per_op:.0f} ns per opcode (min {min(times) / len(bytecode):.0f} ns)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 import syntaxer
 import classifier
+from solver import Sampling
 import code_rewriter
 import utils
 import score
 from fuzzer import Fuzzer
 from score import calculate_performance
 import time
+import random
+from pathlib import Path
 
 
 def resolve_method_ids(assert_map, logger):
@@ -22,11 +25,18 @@ def resolve_method_ids(assert_map, logger):
                 logger.warning(f"Could not resolve method id for {method.method_name}: {e}")
 
 
-def run_fuzzing(assert_map, logger, symbolic_fuzzer=False):
+def run_fuzzing(assert_map, logger, symbolic_fuzzer=False, seed=0, corpus_dir: Path | None = None) -> dict:
     """
     Run fuzzing for every method that has parameters.
     Collect wrong inputs from the fuzzer and attach them to the Method object.
+    With a `corpus_dir` (e.g. corpus_store.DEFAULT_CORPUS_DIR) each method's corpus is
+    kept there and later runs resume from it, with a smaller budget; the result of such
+    a run then depends on the stored corpus, not only on the seed.
+    Every fuzzer gets its own seed derived from the run `seed` (`utils.derive_seed`).
+    Returns, per fuzzed method id, its seed, whether it resumed from a stored corpus,
+    its budget and its fuzzing time.
     """
+    results = {}
     for cls in assert_map.classes:
         for method in cls.methods:
             if not method.parameters:
@@ -40,19 +50,31 @@ def run_fuzzing(assert_map, logger, symbolic_fuzzer=False):
                 method_params = method.method_id[method.method_id.index('(') + 1:method.method_id.index(')')]
                 if method_params == "()" or "CappedInteger" in method_params or '[' in method_params:
                     continue
-                fuzzer = Fuzzer(method.method_id, symbolic_corpus=symbolic_fuzzer)
+                start = time.time()
+                fuzzer = Fuzzer(method.method_id, symbolic_corpus=symbolic_fuzzer, corpus_dir=corpus_dir, seed=seed)
+                print(f"Fuzzing {method.method_id} with seed {fuzzer.seed}")
                 fuzzer.fuzz()
                 print(fuzzer.wrong_inputs)
+                results[method.method_id] = {
+                    "seed": fuzzer.seed, "resumed": fuzzer.resumed, "budget": fuzzer.fuzz_for, "time": time.time() - start,
+                }
+                logger.info(f"Fuzzed {method.method_id}: seed {fuzzer.seed}, budget {fuzzer.fuzz_for}, resumed from stored corpus: {fuzzer.resumed}")
 
                 for wrong_inputs_set in fuzzer.wrong_inputs:
                     method.add_wrong_inputs(wrong_inputs_set)
 
             except Exception as e:
                 logger.error(f"Fuzzer failed for {method.method_name}: {e}")
+    return results
 
 
-def run(Syntatic_analysis_enabled=True, Assetion_solver_enabled=True, Dynamic_analysis_enabled=True, Symbolic_execution_enabled=True):
+def run(Syntatic_analysis_enabled=True, Assetion_solver_enabled=True, Dynamic_analysis_enabled=True, Symbolic_execution_enabled=True, seed=None,
+        sampling: Sampling = "sequential", corpus_dir: Path | None = None):
     logger = utils.configure_logger()
+    # all randomness of the run derives from this seed, pass it again to reproduce the run
+    if seed is None:
+        seed = random.SystemRandom().randrange(1 << 32)
+    logger.info(f"Run seed: {seed}")
     start_syntatic_analysis = 0
     end_syntatic_analysis = 0
 
@@ -69,14 +91,14 @@ def run(Syntatic_analysis_enabled=True, Assetion_solver_enabled=True, Dynamic_an
     # ASSERT CLASSIFICATION
     # (Z3 Solver + Param Generation Fuzzer + Interpreter)
     if Assetion_solver_enabled or Dynamic_analysis_enabled:
-        assert_map, time_measurements_classification_z3_dynamic = classifier.run(assert_map, Assetion_solver_enabled, Dynamic_analysis_enabled)
+        assert_map, time_measurements_classification_z3_dynamic = classifier.run(assert_map, Assetion_solver_enabled, Dynamic_analysis_enabled, sampling=sampling, seed=seed)
     else:
         time_measurements_classification_z3_dynamic = {'static_solver': 0, 'dynamic': 0}
 
     
     # COVERAGE BASED FUZZING
     start_time_fuzzing = time.time()
-    run_fuzzing(assert_map, logger, symbolic_fuzzer=Symbolic_execution_enabled)
+    fuzzing_results = run_fuzzing(assert_map, logger, symbolic_fuzzer=Symbolic_execution_enabled, seed=seed, corpus_dir=corpus_dir)
     end_time_fuzzing = time.time()
 
     time_measurements_fuzzing = end_time_fuzzing - start_time_fuzzing
@@ -89,6 +111,7 @@ def run(Syntatic_analysis_enabled=True, Assetion_solver_enabled=True, Dynamic_an
 
     time_measurements_rewriting = end_time_rewriting - start_time_rewriting
 
+    print(f"Run seed: {seed} (the seed of every method is utils.derive_seed(run seed, method id))")
     print("Execution times:")
     print(f"Classification static: {end_syntatic_analysis-start_syntatic_analysis}")
     print(f"Classification z3_solver: {time_measurements_classification_z3_dynamic["static_solver"]}\nClassification dynamic: {time_measurements_classification_z3_dynamic["dynamic"]}")
@@ -96,6 +119,9 @@ def run(Syntatic_analysis_enabled=True, Assetion_solver_enabled=True, Dynamic_an
     print(f"Classification total: {time_measurements_classification_z3_dynamic['static_solver'] + time_measurements_classification_z3_dynamic["dynamic"] + (end_syntatic_analysis - start_syntatic_analysis)}")
     print(f"Rewriting: {time_measurements_rewriting}")
     print(f"Fuzzing: {time_measurements_fuzzing} -------- Symbolic execution enabled: {Symbolic_execution_enabled}")
+    print(f"Fuzzing corpus store: {corpus_dir or 'disabled'}")
+    for method_id, result in fuzzing_results.items():
+        print(f"  {method_id}: {result['time']} -------- seed {result['seed']}, budget {result['budget']}, resumed: {result['resumed']}")
 
     # calculate_performance(assert_map=assert_map)
 
@@ -106,4 +132,8 @@ if __name__ == "__main__":
     Dynamic_analysis_enabled = True
 
     Symbolic_execution_enabled = True
-    run(Syntatic_analysis_enabled, Assetion_solver_enabled, Dynamic_analysis_enabled, Symbolic_execution_enabled)
\ No newline at end of file
+    # how the solver spreads the models given to the interpreter, "sequential" or "diverse"
+    Sampling_mode = "diverse"
+    # set to corpus_store.DEFAULT_CORPUS_DIR to keep the fuzzing corpora and resume from them
+    Corpus_dir = None
+    run(Syntatic_analysis_enabled, Assetion_solver_enabled, Dynamic_analysis_enabled, Symbolic_execution_enabled, sampling=Sampling_mode, corpus_dir=Corpus_dir)
\ No newline at end of file
@@ -1,7 +1,9 @@
+import random
 import z3
 
 from core import Map, Classification
-from solver import AssertSolver, GenerationInvoker, SolveResult
+from solver import AssertSolver, GenerationInvoker, SolveResult, Sampling
+from utils import derive_seed
 
 import time
 
@@ -19,7 +21,7 @@ def classify_base(result: SolveResult) -> Classification:
         case z3.unsat:
             classification = "tautology"
         case z3.sat:
-            if result.model:
+            if result.model and not result.contradiction:
                 classification = "contingent"
             else:
                 classification = "contradiction"
@@ -28,7 +30,7 @@ def classify_base(result: SolveResult) -> Classification:
 
     return classification
 
-def classify_advanced(result: SolveResult, method_id: str, params_order: list[str], max_attempts: int = 10) -> Classification:
+def classify_advanced(result: SolveResult, method_id: str, params_order: list[str], max_attempts: int = 10, rng: random.Random | None = None) -> Classification:
     """
     Uses the interpreter to classify the assertion as useful or useless.
     The assertion is useful if running with a possible solution throws an exception.
@@ -43,7 +45,7 @@ def classify_advanced(result: SolveResult, method_id: str, params_order: list[st
     model = result.model
     z3_vars = result.variables
 
-    invoker = GenerationInvoker(method_id)
+    invoker = GenerationInvoker(method_id, rng)
 
     try:
         output = invoker.invoke(params_order, model, z3_vars)
@@ -58,8 +60,13 @@ def classify_advanced(result: SolveResult, method_id: str, params_order: list[st
             return 'useless', output.depth
 
 
-def run(assert_map: Map, Assetion_solver_enabled=True, Dynamic_analysis_enabled=True) -> Map:
-    """Classify all assertions not classified from Syntactic Analysis."""
+def run(assert_map: Map, Assetion_solver_enabled=True, Dynamic_analysis_enabled=True, sampling: Sampling = "sequential", seed: int = 0) -> Map:
+    """
+    Classify all assertions not classified from Syntactic Analysis.
+    `sampling` selects how the solver spreads the models fed to the interpreter (see AssertSolver).
+    Model sampling and the values of parameters missing from a model are drawn from
+    per-method streams derived from the run `seed`.
+    """
 
     Time_measurements_basic_classification = []
     Time_measurements_advanced_classification = []
@@ -68,43 +75,51 @@ def run(assert_map: Map, Assetion_solver_enabled=True, Dynamic_analysis_enabled=
         # print(f"====== CLASS: {c.class_name} ======")
         for m in c.methods:
             # print(f"\n====== METHOD: {m.method_name} ======")
-            for a in m.assertions:
+            pending = [a for a in m.assertions if a.classification == 'unclassified']
+            if not pending:
+                continue
+            var_types = {v.name: v.type for v in m.parameters + m.local_variables}
+            method_seed = derive_seed(seed, getattr(m, "method_id", m.method_name))
+            rng = random.Random(method_seed)
+
+            # base classification: all assertions of the method in one solver session
+            batch = [None] * len(pending)
+            share_basic = 0
+            if Assetion_solver_enabled:
+                start_time_basic = time.time()
+                batch = AssertSolver([a.assertion_node for a in pending], var_types, sampling=sampling, seed=method_seed).solve_each()
+                share_basic = (time.time() - start_time_basic) / len(pending)
+
+            for a, result in zip(pending, batch):
                 # print(f"\n====== ASSERT: {a.assertion_node.text.decode()} ======")
 
                 classification = a.classification
-                if classification == 'unclassified':
-
-                    start_time_basic = 0
-                    end_time_basic = 0
-                    # base classification
-                    if Assetion_solver_enabled:
-                        start_time_basic = time.time()
-                        solver = AssertSolver([a.assertion_node])
-                        result = solver.solve()
-                        classification = classify_base(result)
-                        end_time_basic = time.time()
-                    
-                    start_time_advanced = 0
-                    end_time_advanced = 0
-                    # advanced classification
-                    if Dynamic_analysis_enabled:
-                        start_time_advanced = time.time()
-                        if classification == 'contingent':
-                            # find method id from methods.txt using method name
-                            # TODO: extract logic in analyzer
-                            params_order = [p.name for p in m.parameters]
-
-                            for i in range(2,10):
-                                classification, depth = classify_advanced(result, m.method_id, params_order)
-                                if classification != 'useful' or depth != 0:
-                                    break
-                                solver = AssertSolver([a.assertion_node])
-                                result = solver.solve(attempts=i)
-                        end_time_advanced = time.time()
-
-                    Time_measurements_basic_classification.append(end_time_basic-start_time_basic)
-                    Time_measurements_advanced_classification.append(end_time_advanced-start_time_advanced)
-                            
+                if result is not None:
+                    classification = classify_base(result)
+
+                start_time_advanced = 0
+                end_time_advanced = 0
+                # advanced classification
+                if Dynamic_analysis_enabled:
+                    start_time_advanced = time.time()
+                    if classification == 'contingent':
+                        # find method id from methods.txt using method name
+                        # TODO: extract logic in analyzer
+                        params_order = [p.name for p in m.parameters]
+                        # further models are only enumerated (lazily, in the session of the method) if the first one is not conclusive
+                        models = result.models or iter(())
+
+                        for _ in range(2,10):
+                            classification, depth = classify_advanced(result, m.method_id, params_order, rng=rng)
+                            if classification != 'useful' or depth != 0:
+                                break
+                            # pull the next distinct model from the same solver (keep the last one if exhausted)
+                            result = next(models, result)
+                    end_time_advanced = time.time()
+
+                Time_measurements_basic_classification.append(share_basic)
+                Time_measurements_advanced_classification.append(end_time_advanced-start_time_advanced)
+
                 a.classification = classification
 
     Time_basic_classification_avg = sum(Time_measurements_basic_classification)/len(Time_measurements_basic_classification)
@@ -1,5 +1,7 @@
 from z3 import *
 import re
+from jpamb import jvm
+from input_schema import codec, symbolic_type, from_symbolic
 
 def parse_branches(lines):
     """
@@ -48,18 +50,12 @@ def extract_z3_variables(conditions):
 def solve_branch(conds, method_params):
     """
     Solve symbolic constraints with Z3.
+    `method_params` are the primitive jvm types of the symbolic variables.
     """
     var_names = extract_z3_variables(conds)
     z3_vars = {}
     for name, t in zip(var_names, method_params):
-        if t == 'I':
-            z3_vars[name] = Int(name)
-        elif t == 'C':
-            z3_vars[name] = Int(name)
-        elif t == 'Z':
-            z3_vars[name] = Bool(name)
-        else:
-            raise ValueError(f"Unknown type '{t}'")
+        z3_vars[name] = z3_variable(name, t)
 
     s = Solver()
     for c in conds:
@@ -72,27 +68,40 @@ def solve_branch(conds, method_params):
 
     input_values = []
     for name, t in zip(var_names, method_params):
-        val = model[z3_vars[name]]
-        if t == 'I':
-            input_values.append(val.as_long())
-        elif t == 'C':
-            input_values.append(chr(val.as_long()))
-        elif t == 'Z':
-            input_values.append(val == True)
+        val = model.eval(z3_vars[name], model_completion=True)
+        input_values.append(python_value(val, t))
 
     #pad missing values
     while len(input_values) < len(method_params):
-        t = method_params[len(input_values)]
-        if t == 'I':
-            input_values.append(0)
-        elif t == 'C':
-            input_values.append('a')
-        elif t == 'Z':
-            input_values.append(False)
+        input_values.append(codec(method_params[len(input_values)]).default())
 
     return input_values
 
 
+def z3_variable(name, t):
+    """The Z3 constant for a symbolic variable of primitive type `t`."""
+    match t:
+        case jvm.Boolean():
+            return Bool(name)
+        case jvm.Float() | jvm.Double():
+            return Real(name)
+        case jvm.Int() | jvm.Short() | jvm.Byte() | jvm.Long() | jvm.Char():
+            return Int(name)
+    raise ValueError(f"Unknown type '{t}'")
+
+
+def python_value(val, t):
+    """The value of a solved Z3 constant, as the fuzzer represents type `t`."""
+    match t:
+        case jvm.Boolean():
+            return is_true(val)
+        case jvm.Char():
+            return chr(val.as_long())
+        case jvm.Float() | jvm.Double():
+            return float(val.as_fraction())
+    return val.as_long()
+
+
 def generate_inputs(method_params, solution):
     """
     Format the solution into the same output structure
@@ -106,7 +115,13 @@ def generate_inputs(method_params, solution):
     return solution[:len(method_params)]
 
 
-def generate_corpus(branches, primitive_params, method_params):
+def generate_corpus(branches, method_params):
+    """
+    One input (in the fuzzer's tuple representation) per satisfiable branch.
+    Every parameter is a single symbolic variable of its `symbolic_type`; arrays
+    and objects are built around the solved value (see `input_schema.from_symbolic`).
+    """
+    primitive_params = [symbolic_type(t) for t in method_params]
     branches_map = parse_branches(branches)
     corpus = []
     for conds, status in branches_map:
@@ -115,19 +130,8 @@ def generate_corpus(branches, primitive_params, method_params):
             if sol:
                 corpus.append(generate_inputs(primitive_params, sol))
 
-    unique_inputs = list(map(list, {tuple(x) for x in corpus}))
-    param_count = 0
-    while len(method_params) > 0:
-        if method_params[0] == 'L':
-            name = method_params[1:method_params.find('<init>')]
-            ctor_params = method_params[method_params.find('<init>') + 6: method_params.find(';')]
-            j = 0
-            while j < len(unique_inputs):
-                unique_inputs[j][param_count] = [name, unique_inputs[j][param_count]]
-                j += 1
-            method_params = method_params[method_params.find(';') + 1:]
-            param_count += 1
-        else:
-            method_params = method_params[1:]
-            param_count += 1
-    return unique_inputs
+    unique_inputs = {tuple(x) for x in corpus}
+    return [
+        tuple(from_symbolic(t, v) for t, v in zip(method_params, x))
+        for x in sorted(unique_inputs, key=repr)
+    ]
@@ -0,0 +1,90 @@
+"""
+On-disk fuzzing corpus, one directory per method id.
+
+Every entry is a JSON file named after the content hash of its input:
+    {"input": [...], "coverage": "<fingerprint of the bucketed edge map>", "crash": "<crash bucket>" | null}
+
+The crash bucket is the crash signature of the fuzzer (`fuzzer.crash_signature`)
+as formatted by `CrashBucket`: "<message>@<method>:<pc>#<hash of the calling frames>".
+
+On save, only the smallest input per (coverage, crash) signature is kept, so the
+directory converges to one representative per distinct behaviour.
+
+Usage: store = CorpusStore(DEFAULT_CORPUS_DIR, "jpamb.cases.Simple.divideByN:(I)I")
+       for input, coverage, crash in store.load(): ...
+       store.save([(input, coverage, crash), ...])
+"""
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+DEFAULT_CORPUS_DIR = Path(__file__).parent.joinpath(".corpus")
+
+
+def _tuplify(x):
+    """JSON arrays back into the fuzzer's tuple representation."""
+    if isinstance(x, list):
+        return tuple(_tuplify(v) for v in x)
+    return x
+
+
+def _encode(input) -> str:
+    return json.dumps(input, separators=(",", ":"))
+
+
+class CorpusStore:
+    def __init__(self, root: Path, method: str):
+        digest = hashlib.sha1(method.encode()).hexdigest()[:8]
+        readable = re.sub(r"[^A-Za-z0-9_.-]", "_", method)[:100]
+        self.path = Path(root).joinpath(f"{readable}-{digest}")
+
+    def _entries(self):
+        """(file, record) of every readable entry on disk."""
+        if not self.path.is_dir():
+            return
+        for file in sorted(self.path.glob("*.json")):
+            try:
+                with open(file) as fp:
+                    record = json.load(fp)
+                yield file, record
+            except (OSError, ValueError):
+                continue
+
+    def load(self) -> list[tuple]:
+        """All stored (input, coverage, crash) entries, inputs in the fuzzer's tuple representation."""
+        return [
+            (_tuplify(record["input"]), record.get("coverage"), record.get("crash"))
+            for _, record in self._entries() if "input" in record
+        ]
+
+    def save(self, entries):
+        """
+        Merge `entries` of (input, coverage, crash) into the store, keeping the smallest
+        input per (coverage, crash) signature and removing the entries it supersedes.
+        """
+        best = {}
+        for file, record in self._entries():
+            encoded = _encode(record.get("input"))
+            signature = (record.get("coverage"), record.get("crash"))
+            best.setdefault(signature, []).append((len(encoded), encoded, file))
+        for input, coverage, crash in entries:
+            encoded = _encode(input)
+            best.setdefault((coverage, crash), []).append((len(encoded), encoded, None))
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        for (coverage, crash), candidates in best.items():
+            candidates.sort(key=lambda c: (c[0], c[1]))
+            _, encoded, file = candidates[0]
+            if file is None:
+                name = hashlib.sha256(encoded.encode()).hexdigest()[:16]
+                target = self.path.joinpath(f"{name}.json")
+                tmp = target.with_suffix(".tmp")
+                with open(tmp, "w") as fp:
+                    json.dump({"input": json.loads(encoded), "coverage": coverage, "crash": crash}, fp)
+                os.replace(tmp, target)
+                file = target
+            for _, _, other in candidates[1:]:
+                if other is not None and other != file:
+                    other.unlink(missing_ok=True)
@@ -0,0 +1,128 @@
+"""
+AFL-style edge coverage for the interpreter and the fuzzer.
+
+Every executed control-flow edge (method, from_pc) -> (method', to_pc) is hashed
+into a fixed-size map of hit counts. The fuzzer compares the bucketed hit counts
+of a run against the edges seen so far to decide whether an input is interesting.
+The operands of the executed comparisons are recorded too, as mutation dictionary.
+
+Usage: trace = Trace()
+       result = interpret(method_id, inputs, trace=trace.reset())
+       if coverage.update(trace.classified()): ...
+
+A trace is meant to be reused for every execution: `reset` only clears the
+entries the previous execution touched, instead of allocating a new map.
+"""
+import hashlib
+import zlib
+from dataclasses import dataclass, field
+
+MAP_SIZE = 1 << 16
+MAP_MASK = MAP_SIZE - 1
+
+# hit count -> AFL bucket bit: 1, 2, 3, 4-7, 8-15, 16-31, 32-127, 128+
+COUNT_CLASSES = bytes(
+    0 if n == 0 else
+    1 if n == 1 else
+    2 if n == 2 else
+    4 if n == 3 else
+    8 if n < 8 else
+    16 if n < 16 else
+    32 if n < 32 else
+    64 if n < 128 else
+    128
+    for n in range(256)
+)
+
+# (method, offset | outcome) -> location id, stable across runs and processes
+_LOCATIONS: dict[tuple, int] = {}
+
+
+def location(method, offset) -> int:
+    """Return the location id of an instruction (or of a named outcome of a method)."""
+    key = (method, offset)
+    loc = _LOCATIONS.get(key)
+    if loc is None:
+        loc = zlib.crc32(f"{method}:{offset}".encode()) & MAP_MASK
+        _LOCATIONS[key] = loc
+    return loc
+
+
+@dataclass
+class Trace:
+    """Hit counts of the edges taken by a single execution."""
+    edges: bytearray = field(default_factory=lambda: bytearray(MAP_SIZE))
+    # indices of the edges taken, in order of their first hit
+    hit: list[int] = field(default_factory=list)
+    # integer operands of the executed if/ifz comparisons
+    operands: set[int] = field(default_factory=set)
+    # number of visited locations, i.e. interpreter steps
+    steps: int = 0
+    prev: int = 0
+
+    def visit(self, method, offset):
+        """Record the edge from the previously visited location to (method, offset)."""
+        self.steps += 1
+        loc = location(method, offset)
+        index = self.prev ^ loc
+        count = self.edges[index]
+        if count == 0:
+            self.hit.append(index)
+        if count < 255:
+            self.edges[index] = count + 1
+        # shifted, so A -> B and B -> A (and tight loops A -> A) get different edges
+        self.prev = loc >> 1
+
+    def reset(self) -> "Trace":
+        """Clear the trace for the next execution (only the edges the last one hit)."""
+        edges = self.edges
+        for index in self.hit:
+            edges[index] = 0
+        # new containers, the result of the last execution may still refer to the old ones
+        self.hit = []
+        self.operands = set()
+        self.steps = 0
+        self.prev = 0
+        return self
+
+    def compare(self, v1, v2):
+        """Record the operands of a comparison (chars as their code point)."""
+        for v in (v1, v2):
+            if isinstance(v, str) and len(v) == 1:
+                v = ord(v)
+            if isinstance(v, int) and not isinstance(v, bool):
+                self.operands.add(v)
+
+    def classified(self) -> bytes:
+        """The map with every hit count replaced by its bucket bit."""
+        return bytes(self.edges.translate(COUNT_CLASSES))
+
+
+def fingerprint(classified: bytes) -> str:
+    """Stable digest of a bucketed map: equal for runs taking the same edges about as often."""
+    return hashlib.blake2b(classified, digest_size=16).hexdigest()
+
+
+class CoverageMap:
+    """The union of the bucketed edge maps of all executions seen so far."""
+    def __init__(self):
+        self.seen = 0
+        # indices of the covered edges, grown by `update`
+        self.covered: set[int] = set()
+
+    def update(self, classified: bytes) -> int:
+        """Merge a bucketed trace into the map. Returns the newly covered bucket bits (0 if none)."""
+        bits = int.from_bytes(classified, "little")
+        new = bits & ~self.seen
+        if new:
+            self.seen |= new
+            rest = new
+            while rest:
+                lowest = rest & -rest
+                self.covered.add((lowest.bit_length() - 1) >> 3)
+                rest ^= lowest
+        return new
+
+    def edge_count(self) -> int:
+        """Number of distinct edges covered."""
+        return len(self.covered)
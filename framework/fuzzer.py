@@ -1,43 +1,215 @@
 import random
-import string
-from copy import deepcopy
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import accumulate
+from pathlib import Path
 from typing import List
-from interpreter import interpret
+import jpamb
+from jpamb import jvm
+from jpamb.model import Input
+from interpreter import interpret, InterpretationResult
+from coverage import Trace, CoverageMap, fingerprint
+from corpus_store import CorpusStore
+from minimizer import minimize
 from core import WrongInput
+from utils import derive_seed
+from input_schema import Constructed, codec, decode_params
+
+
+# executions between two recomputations of the seed energies
+REWEIGHT_EVERY = 100
+# values the mutators substitute in, next to the constants harvested from the method
+INTERESTING_VALUES = (-1, 0, 1, 128, -128)
+# upper bound on the dictionary, further runtime comparison operands are dropped
+MAX_DICTIONARY = 512
+# inputs of a crash bucket checked for an unprotected crash before the bucket is only counted
+MAX_TRIAGE = 5
+
+
+def harvest_constants(method_id: jvm.AbsMethodID) -> set[int]:
+    """
+    Integer constants in the bytecode of a method: pushed values (array sizes
+    included) together with their neighbours, which pass or just miss `<`/`<=`
+    guards, and the 0 every ifz compares with.
+    """
+    constants = set()
+    suite = jpamb.Suite(Path(__file__).parent.joinpath("../"))
+    try:
+        opcodes = list(suite.method_opcodes(method_id))
+    except (OSError, IndexError, KeyError):
+        return constants
+
+    for op in opcodes:
+        match op:
+            case jvm.Push(value=value):
+                v = value.value
+                if isinstance(v, str) and len(v) == 1:
+                    v = ord(v)
+                if isinstance(v, int) and not isinstance(v, bool):
+                    constants.update((v - 1, v, v + 1))
+            case jvm.Ifz():
+                constants.add(0)
+    return constants
+
+
+def crash_signature(output: InterpretationResult) -> tuple[str, str, int, int]:
+    """(message, faulting method, pc, hash of the calling frames) of a crashing execution."""
+    *callers, (method, pc) = output.stack or ((None, output.depth),)
+    stack_hash = zlib.crc32("|".join(f"{m}:{o}" for m, o in callers).encode())
+    return (output.message, str(method), pc, stack_hash)
+
+
+@dataclass
+class CrashBucket:
+    """All crashes with the same signature, triaged until one input gives a representative."""
+    signature: tuple[str, str, int, int]
+    count: int = 0
+    # inputs checked for an unprotected crash so far (at most MAX_TRIAGE)
+    triaged: int = 0
+    # minimized input, None while the crash is only seen guarded by assertions
+    representative: tuple | None = None
+    wrong_inputs: List[WrongInput] = field(default_factory=list)
+
+    def __str__(self):
+        message, method, pc, stack_hash = self.signature
+        return f"{message}@{method}:{pc}#{stack_hash:08x}"
+
+
+class Corpus:
+    """
+    Coverage key -> input, with the inputs also kept in a flat list so a seed can be
+    picked without rebuilding `values()` on every fuzzing iteration.
+
+    Next to every input the corpus keeps the edges it covers and how many steps it
+    took to run, which the power schedule turns into selection weights (`reweight`).
+    Until then, seeds are picked uniformly.
+    """
+    def __init__(self, entries: dict | None = None, rng: random.Random | None = None):
+        self.rng = rng if rng is not None else random.Random()
+        self._index = {}
+        self.inputs = []
+        self.edges: list[tuple[int, ...]] = []
+        # interpreter steps per execution: the cost measure of the power schedule, unlike
+        # wall-clock time it is the same in every run
+        self.exec_steps: list[int] = []
+        self._cum_weights = None
+        for key, input in (entries or {}).items():
+            self[key] = input
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __getitem__(self, key):
+        return self.inputs[self._index[key]]
+
+    def __setitem__(self, key, input):
+        self.add(key, input)
+
+    def add(self, key, input, edges: tuple[int, ...] = (), exec_steps: int = 0):
+        """Insert or replace the input for `key` together with its run statistics."""
+        if key in self._index:
+            i = self._index[key]
+            self.inputs[i], self.edges[i], self.exec_steps[i] = input, edges, exec_steps
+        else:
+            self._index[key] = len(self.inputs)
+            self.inputs.append(input)
+            self.edges.append(edges)
+            self.exec_steps.append(exec_steps)
+            self._cum_weights = None
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def __repr__(self):
+        return repr({key: self.inputs[i] for key, i in self._index.items()})
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self):
+        return self.inputs
 
+    def reweight(self, weights):
+        """Set the selection weight of every input (in insertion order)."""
+        self._cum_weights = list(accumulate(weights))
 
-class CustomType:
-    def __init__(self, name, params):
-        self.name = name
-        self.init_params = params
+    def choice(self):
+        if self._cum_weights is None:
+            return self.rng.choice(self.inputs)
+        # O(log n) weighted pick on the cumulative weights
+        return self.rng.choices(self.inputs, cum_weights=self._cum_weights)[0]
 
 
 """
     A fuzzer that generates random or coverage-guided inputs for the JPAMB methods.
 
+    Inputs are immutable tuples with one component per parameter, typed by the
+    schema in `method_params`: primitives are plain values, arrays are tuples of
+    elements and objects are tuples of constructor arguments.
+
     Usage: f = Fuzzer("jpamb.cases.Arrays.arraySpellsHello:([C)V", None, True)
            f.fuzz()
 """
 class Fuzzer:
-    def __init__(self, method: str, corpus: List = None, symbolic_corpus=False, coveraged_based: bool = True, fuzz_for: int = 10_000):
+    def __init__(self, method: str, corpus: List = None, symbolic_corpus=False, coveraged_based: bool = True, fuzz_for: int = 10_000, plateau: int | None = 1_000,
+                 corpus_dir: Path | None = None, resume_budget: int = 500, seed: int = 0):
         try:
             self.method = method
+            self.method_id = jvm.AbsMethodID.decode(method)
+            # every method gets its own stream, derived from the run seed, so runs can be
+            # reproduced method by method whatever else is fuzzed in the same run
+            self.run_seed = seed
+            self.seed = derive_seed(seed, method)
+            self.rng = random.Random(self.seed)
             self.coverage_based = coveraged_based
             self.method_params = self.parse_parameters(method)
-            self.corpus = {}
-            if symbolic_corpus:
+            self.codecs = [codec(t) for t in self.method_params]
+            # inputs saved by earlier runs, if a corpus directory is given
+            self.store = CorpusStore(corpus_dir, method) if corpus_dir is not None else None
+            stored = self.store.load() if self.store is not None else []
+            stored = [(x, coverage) for x, coverage, _ in stored if len(x) == len(self.method_params)]
+            self.corpus = Corpus(rng=self.rng)
+            # whether the corpus was resumed from the store (with the smaller budget)
+            self.resumed = bool(stored)
+            if stored:
+                # resuming: the stored corpus is already saturated, a small budget finds what is left.
+                # Seeds are keyed by their coverage fingerprint, like the inputs `fuzz` adds, so a
+                # smaller input for the same path replaces the seed instead of being added next to it
+                entries = {}
+                for i, (x, coverage) in enumerate(stored):
+                    entries.setdefault(coverage if coverage is not None else ("stored", i), x)
+                self.corpus = Corpus(entries, self.rng)
+                fuzz_for = min(fuzz_for, resume_budget)
+            elif symbolic_corpus:
                     result = interpret(method, "", corpus=True)
-                    generated_corpus = {-i-1: inp for i, inp in enumerate(result)}
-                    self.corpus = generated_corpus
+                    generated_corpus = {-i-1: self.as_input(inp) for i, inp in enumerate(result)}
+                    self.corpus = Corpus(generated_corpus, self.rng)
                     print(f"method: {method}, generated_corpus: {generated_corpus}")
                     if not generated_corpus:
-                        self.corpus = {0: self.random_input() if corpus is None else corpus}
+                        self.corpus = Corpus({0: self.random_input() if corpus is None else self.as_input(corpus)}, self.rng)
             else:
-                self.corpus = {0: self.random_input() if corpus is None else corpus}
+                self.corpus = Corpus({0: self.random_input() if corpus is None else self.as_input(corpus)}, self.rng)
 
             # print(f"CORPUS: \n{self.corpus}")
 
+            self.coverage = CoverageMap()
+            # one edge map for all executions, cleared between them
+            self.trace = Trace()
+            # constants the mutators pick from: harvested from the bytecode, then
+            # extended with the comparison operands seen at runtime
+            self.dictionary = list(INTERESTING_VALUES)
+            self._in_dictionary = set(self.dictionary)
+            self._extend_dictionary(harvest_constants(self.method_id))
+            # number of executions that took each edge, for the power schedule
+            self.edge_freq = Counter()
+            # corpus key -> (coverage fingerprint, crash signature) of the input, for the store
+            self.signatures = {}
+            # crash signature -> bucket
+            self.crashes: dict[tuple, CrashBucket] = {}
             self.fuzz_for = fuzz_for
+            # stop fuzzing after this many executions without new coverage (None: never)
+            self.plateau = plateau
             self.wrong_inputs: List[List[WrongInput]] = []
             self.error_map = {}
         except ValueError as e:
@@ -45,213 +217,83 @@ class Fuzzer:
             return ValueError(f"Fuzzer error: {e}")
 
 
-    # Parses JVM descriptors between ( and ) into a list like ["I", "[C"].
+    # Decodes the parameter types of the method (see `input_schema.decode_params`).
+    # Example: "...:(I[C)V" → [Int(), Array(Char())]
     def parse_parameters(self, method: str):
-        params_start = method.index('(') + 1
-        params_end = method.index(')')
-        params = method[params_start:params_end]
-
-        result = []
-        while len(params) > 0:
-            if params[0] == 'L':
-                name = params[1:params.find('<init>')]
-                ctor_params = params[params.find('<init>') + 6: params.find(';')]
-                j = 0
-                init_params = []
-                while j < len(ctor_params):
-                    if ctor_params[j] == '[':
-                        init_params.append("[" + ctor_params[j + 1])
-                        j += 2
-                    else:
-                        init_params.append(ctor_params[j])
-                        j += 1
-                result.append(CustomType(name, init_params))
-                i = params.find(';')
-                params = params[i+1:]
-            elif params[0] == '[':
-                result.append("[" + params[1])
-                params = params[2:]
-            else:
-                result.append(params[0])
-                params = params[1:]
-        return result
+        return list(decode_params(method))
 
-    # Returns a random Python value for a primitive JVM type.
-    # Example: random_value("I") → 57
-    def random_value(self, t: str):
-        match t:
-            case "I":
-                return random.randint(-1000, 1000)
-            case "S":
-                return random.randint(-1000, 1000)
-            case "J":
-                return random.randint(-10 ** 5, 10 ** 5)
-            case "B":
-                return random.randint(-128, 127)
-            case "Z":
-                return random.choice([True, False])
-            case "C":
-                return random.choice(string.ascii_letters)
-            case "F":
-                return round(random.uniform(-1000, 1000), 3)
-            case "D":
-                return round(random.uniform(-1000, 1000), 3)
-        return None
-
-    # Creates a random argument list for the method, including random arrays.
-    # Example: ["I","[C"] → [42, ['C','H','i']]
-    def random_array(self, t):
-        size = random.randint(0, 50)  # max random array size set to 50
-        arr = [self.random_value(t) for _ in range(size)]
-        arr.insert(0, t)
-        return arr
-
-    # Formats an internal argument list into the string format interpret(...) expects.
-    # ExampleL: [['C','H','i']] → "([C:'H','i'])"
+    # Creates a random argument tuple for the method, including random arrays.
+    # Example: [Int(), Array(Char())] → (42, ('C','H','i'))
     def random_input(self):
-        randomized_input = []
-        for t in self.method_params:
-            if isinstance(t, CustomType):
-                input_values = []
-                for v in t.init_params:
-                    if v.startswith('['):
-                        input_values.append(self.random_array(v[1]))
-                    else:
-                        input_values.append(self.random_value(v))
-                input_values.insert(0, t.name)
-                randomized_input.append(input_values)
-            elif t.startswith('['):
-                randomized_input.append(self.random_array(t[1]))
-            else:
-                randomized_input.append(self.random_value(t))
-        return randomized_input
+        return tuple(c.generate(self.rng) for c in self.codecs)
+
+    # Converts a tagged argument list (as produced by the corpus generator or passed in
+    # by hand, e.g. [['jpamb/cases/PositiveInteger', 3], 1] or [['C','H','i']]) into
+    # the typed tuple representation. Components that already are tuples are kept as is.
+    def as_input(self, raw):
+        return tuple(c.from_raw(x) for c, x in zip(self.codecs, raw))
 
-    # Formats an internal argument list into the string format interpret(...) expects.
-    # ExampleL: [['C','H','i']] → "([C:'H','i'])"
+    # Formats an internal argument tuple for reports (see `Codec.encode`), interpret(...) gets `to_input`.
+    # Example: (('H','i'),) → "([C:'H','i'])"
     def format_input(self, input):
-        def format(x):
-            if isinstance(x, str):
-                return f"'{x}'"
-            if isinstance(x, bool):
-                return 'true' if x else 'false'
-            if isinstance(x, list):
-                base_type = x[0]
-                x.remove(base_type)
-                if len(base_type) > 1:
-                    result = f"new {base_type}(" + ",".join(format(v) for v in x) + ")"
-                else:
-                    result =  f"[{base_type}:" + ",".join(format(v) for v in x) + "]"
-                x.insert(0, base_type)
-                return result
-            return str(x)
-
-        return "(" + ",".join(format(v) for v in input) + ")"
-
-    # Mutates input arguments using either deterministic or havoc mutations.
-    # Example: [10] → [19]   # maybe adds +9
-    # ['C','H','i'] → ['C','i','H']  # maybe reversed
+        return "(" + ",".join(c.encode(x) for c, x in zip(self.codecs, input)) + ")"
+
+    # Converts an internal argument tuple into the jvm values interpret(...) accepts directly.
+    # Example: (3, ('H','i')) → Input((int 3), (array char ('H','i')))
+    def to_input(self, input) -> Input:
+        return Input(tuple(c.to_value(x) for c, x in zip(self.codecs, input)))
+
+    # Deterministic mutation of a single value of type t; returns a new value.
+    # Example: (10, Int()) → 9   # maybe flips the lowest bit
+    def _deterministic(self, x, t):
+        return codec(t).deterministic(x, self.rng, self.dictionary)
+
+    # Havoc mutation of a single value of type t; returns a new value.
+    # Example: (('H','i'), Array(Char())) → ('i','H')  # maybe reversed
+    def _havoc(self, x, t):
+        return codec(t).havoc(x, self.rng, self.dictionary)
+
+    # Adds new constants to the dictionary, up to MAX_DICTIONARY entries.
+    def _extend_dictionary(self, values):
+        for v in sorted(values - self._in_dictionary):
+            if len(self.dictionary) >= MAX_DICTIONARY:
+                return
+            self.dictionary.append(v)
+            self._in_dictionary.add(v)
+
+    # Mutates a single parameter value using either deterministic or havoc mutations.
+    def mutate_component(self, x, t):
+        return self.rng.choice([self._havoc, self._deterministic])(x, t)
+
+    # Mutates input arguments using either deterministic or havoc mutations. Only the
+    # mutated components are rebuilt, the others are shared with the source input.
+    # Example: (10,) → (19,)   # maybe adds +9
+    # (('H','i'),) → (('i','H'),)  # maybe reversed
     def mutate(self, input):
-        def deterministic(x):
-            if isinstance(x, list):
-                base_type = x[0]
-                x.remove(base_type)
-                for i, v in enumerate(x):
-                    x[i] = deterministic(v)
-                x.insert(0, base_type)
-                return x
-            if isinstance(x, bool):
-                x &= random.choice([True, False])
-                return x
-            elif isinstance(x, str) and x:
-                safe_chars = string.ascii_letters + string.digits  # only letters and digits
-                i = random.randrange(len(x))
-                c = chr(ord(x[i]) ^ (1 << random.randint(0, 6)))
-                c = x[:i] + c + x[i+1:]
-                if c not in safe_chars:
-                    c = random.choice(safe_chars)
-                return c
-            else:
-                interesting_substitutions = [-1, 0, 1, 128, -128]
-                ops = [
-                    lambda v: v ^ (1 << random.randint(0, 7)) if isinstance(v, int) else v * v,
-                    lambda v: v + random.randint(-100, 100),
-                    lambda v: random.choice(interesting_substitutions)
-                ]
-                return random.choice(ops)(x)
-
-        def havoc(x):
-            if isinstance(x, list):
-                base_type = x[0]
-                x.remove(base_type)
-                ops = [
-                    lambda v: v + [self.random_value(base_type)], # append
-                    lambda v: v[:-1] if v else v,  # delete last
-                    lambda v: v + v,  # duplicate whole list
-                    lambda v: v[::-1]  # reverse
-                ]
-                x = random.choice(ops)(x)
-                x.insert(0, base_type)
-                return x
-            if isinstance(x, str):
-                ops = [
-                    lambda v: v + chr(random.randint(32, 126)),
-                    lambda v: v[:-1] if v else v,
-                    lambda v: v * 2,
-                    lambda v: ''.join(reversed(v))
-                ]
-                return random.choice(ops)(x)
-            elif isinstance(x, bool):
-                return x ^ (1 << random.randint(0, 7))
-            else:
-                ops = [
-                    lambda v: v + random.randint(-100, 100),
-                    lambda v: v * 2,
-                    lambda v: v // 2 if v else v
-                ]
-                return random.choice(ops)(x)
-
-        mutation = random.choice([havoc, deterministic])
-
-        if(isinstance(input, list)):
-            for i, _ in enumerate(input):
-                if isinstance(input[i], list) and len(input[i][0]) > 1:
-                    custom_type = input[i][0]
-                    input[i].remove(custom_type)
-                    for j, _ in enumerate(input[i]):
-                        input[i][j] = mutation(input[i][j])
-                    input[i].insert(0, custom_type)
-                else:
-                    if random.choice([True, False]):
-                        input[i] = mutation(input[i])
-            return input
-        else:
-            return mutation(input)
+        mutation = self.rng.choice([self._havoc, self._deterministic])
+
+        components = None
+        for i, t in enumerate(self.method_params):
+            # constructor arguments are always mutated, other parameters half of the time
+            if isinstance(t, Constructed) or self.rng.choice([True, False]):
+                if components is None:
+                    components = list(input)
+                components[i] = mutation(input[i], t)
+        return input if components is None else tuple(components)
 
     # Estimates how many bytes the value would take when serialized.
     # Example: 123 → 3
-    # Example: ['C','A'] → approx 5–7
+    # Example: ('A','B') → approx 5–7
     def serialized_size_in_bytes(self, x):
-        if isinstance(x, list):
-            # Byte structure: "[" + items + "]"
-            size = 2  # for "[" and "]"
-            for i, elem in enumerate(x):
-                if isinstance(elem, list) and len(elem[0]) > 1:
-                    size += 2
-                    j = 1
-                    while j < len(elem):
-                        size += self.serialized_size_in_bytes(elem[j])
-                        j += 1
-                else:
-                    size += self.serialized_size_in_bytes(elem)
-                if i > 0:
-                    size += 1  # comma
-            return size
+        if isinstance(x, tuple):
+            # Byte structure: "[" + items + "]", one comma between items
+            return 2 + sum(self.serialized_size_in_bytes(elem) for elem in x) + max(len(x) - 1, 0)
+        if isinstance(x, bool):
+            return 1
         if isinstance(x, int):
             return len(str(x).encode("utf8"))
         if isinstance(x, float):
             return 8
-        if isinstance(x, bool):
-            return 1
         if isinstance(x, str):
             return len(x.encode("utf8"))
 
@@ -270,14 +312,12 @@ class Fuzzer:
     def _search_argument_mutation(self, original_input, idx, depth, min_depth):
         for _ in range(self.fuzz_for):
             # print(f"---FUZZ FOR 2: {self.fuzz_for}---------")
-            candidate = deepcopy(original_input)
-            mutant_source = deepcopy(random.choice(list(self.corpus.values())))
-            mutated = self.mutate(mutant_source)[idx]
+            mutated = self.mutate_component(self.corpus.choice()[idx], self.method_params[idx])
 
             if mutated == original_input[idx]:
                 continue
 
-            candidate[idx] = mutated
+            candidate = original_input[:idx] + (mutated,) + original_input[idx + 1:]
             out = self._run(candidate, assertions_disabled=False)
 
             if out.depth >= min_depth and out.message not in("assertion error", "timeout"):
@@ -290,9 +330,9 @@ class Fuzzer:
         for i in range(len(input)):
             mutated_val = self._search_argument_mutation(input, i, depth, min_depth)
             faulty = self._is_faulty(mutated_val)
-            is_obj = isinstance(input[i], list)
+            is_obj = isinstance(self.method_params[i], Constructed)
             result.append(WrongInput(
-                value=input[i][1] if is_obj else input[i],
+                value=input[i][0] if is_obj else input[i],
                 faulty=faulty,
                 is_obj=is_obj
             ))
@@ -304,66 +344,150 @@ class Fuzzer:
         return check.depth == depth
 
     
-    def _handle_new_coverage(self, input, output, depth, min_depth):
-        self.corpus[depth] = input
-
-        if output.message in("ok", "assertion error", "timeout"):
+    def _handle_crash(self, input, output, min_depth):
+        """
+        Count the crash in its bucket. Inputs of a bucket are triaged until one of them
+        crashes unprotected (at most MAX_TRIAGE of them), later ones are only counted.
+        """
+        if output.message in ("ok", "assertion error", "timeout"):
             return
+        signature = crash_signature(output)
+        bucket = self.crashes.get(signature)
+        if bucket is None:
+            bucket = self.crashes[signature] = CrashBucket(signature)
+        bucket.count += 1
+        if bucket.representative is not None or bucket.triaged >= MAX_TRIAGE:
+            return
+        depth = output.depth
 
         if depth < min_depth:
             return
 
         # If enabling assertions gives same depth, crash is real, not blocked
+        bucket.triaged += 1
         if not self._crash_is_unprotected(input, depth):
             return
         print(output.message)
+        # Report the smallest input that still crashes the same way
+        bucket.representative = minimize(input, self.method_params, lambda x: self._run(x, assertions_disabled=False))
         # Find faulty inputs
         # print("FIND FAULTY WITH THIS OUTPUT: ", output.message)
-        wrong_inputs = self._find_faulty_arguments(input, depth, min_depth)
-        
-        self.wrong_inputs.append(wrong_inputs)
+        bucket.wrong_inputs = self._find_faulty_arguments(bucket.representative, depth, min_depth)
+
+        self.wrong_inputs.append(bucket.wrong_inputs)
 
 
-    def _run(self, input, assertions_disabled):
+    def _run(self, input, assertions_disabled, trace=None):
+        try:
+            inputs = self.to_input(input)
+        except (ValueError, TypeError, AssertionError) as e:
+            return InterpretationResult(f"{e}", 0)
         return interpret(
-            method=self.method,
-            inputs=self.format_input(input),
+            method=self.method_id,
+            inputs=inputs,
             verbose=False,
             assertions_disabled=assertions_disabled,
+            trace=trace,
+        )
+
+    # Runs the initial corpus once so its edges do not count as new coverage later.
+    def _seed_coverage(self, assertions_disabled, min_depth):
+        for key in list(self.corpus.keys()):
+            input = self.corpus[key]
+            output = self._run(input, assertions_disabled, trace=self.trace.reset())
+            if output.trace is not None:
+                classified = output.trace.classified()
+                self.edge_freq.update(output.trace.hit)
+                self._extend_dictionary(output.trace.operands)
+                self.coverage.update(classified)
+                self._record(key, input, output, fingerprint(classified))
+                # seeds may crash as well (stored crash inputs always do), triage them like new finds
+                self._handle_crash(input, output, min_depth)
+
+    # Adds (or replaces) a corpus entry together with the signatures the store keeps.
+    def _record(self, key, input, output, coverage):
+        self.corpus.add(key, input, tuple(output.trace.hit), output.trace.steps)
+        crash = None if output.message == "ok" else str(CrashBucket(crash_signature(output)))
+        self.signatures[key] = (coverage, crash)
+
+    def save_corpus(self):
+        """Merge the corpus into the on-disk store (if any)."""
+        if self.store is None:
+            return
+        self.store.save(
+            (self.corpus[key], coverage, crash) for key, (coverage, crash) in self.signatures.items()
+        )
+
+    # Power schedule: a seed gets more mutations the rarer the edges it covers are,
+    # the fewer steps it runs and the smaller it is, relative to the rest of the corpus.
+    def _energy(self, edges, steps, size, mean_steps, mean_size):
+        rarity = max((1 / self.edge_freq[e] for e in edges if self.edge_freq[e]), default=1.0)
+        speed = min(max(mean_steps / steps, 0.25), 4.0) if steps and mean_steps else 1.0
+        smallness = min(max(mean_size / max(size, 1), 0.25), 4.0)
+        return rarity * speed * smallness
+
+    def _reweight(self):
+        corpus = self.corpus
+        sizes = [self.serialized_size_in_bytes(x) for x in corpus.inputs]
+        timed = [steps for steps in corpus.exec_steps if steps]
+        mean_steps = sum(timed) / len(timed) if timed else 0
+        mean_size = sum(sizes) / len(sizes)
+        corpus.reweight(
+            self._energy(edges, steps, size, mean_steps, mean_size)
+            for edges, steps, size in zip(corpus.edges, corpus.exec_steps, sizes)
         )
 
     
-    def fuzz(self, min_depth=1, max_errors=1, assertion_disabled=True):
+    def fuzz(self, min_depth=1, max_errors=None, assertion_disabled=True):
         """
         Coverage-based (concolic-style) fuzzing.
-        Randomly mutates inputs from the corpus, tracks coverage depth, and
-        identifies inputs that crash without being guarded by assertions.
+        Randomly mutates inputs from the corpus, keeps the ones that hit new edges
+        (or new edge hit-count buckets), and identifies inputs that crash without
+        being guarded by assertions. Crashes are bucketed by signature (see
+        `self.crashes`), every bucket yields at most one set of wrong inputs.
+        `max_errors` stops after that many buckets with wrong inputs (None: never).
         """
-        for _ in range(self.fuzz_for):
-            # print("FUZZ FOR: ", _)
-            seed = deepcopy(random.choice(list(self.corpus.values())))
-            candidate = self.mutate(seed)
+        self._seed_coverage(assertion_disabled, min_depth)
+        self._reweight()
+        idle = 0
+        for i in range(self.fuzz_for):
+            # print("FUZZ FOR: ", i)
+            if max_errors is not None and len(self.wrong_inputs) >= max_errors:
+                break
+            if self.plateau is not None and idle >= self.plateau:
+                break
+            idle += 1
+            if i % REWEIGHT_EVERY == 0:
+                self._reweight()
+            candidate = self.mutate(self.corpus.choice())
 
             # print("CANDIDATE: ", candidate)
-            output = self._run(candidate, assertions_disabled=assertion_disabled)
+            output = self._run(candidate, assertions_disabled=assertion_disabled, trace=self.trace.reset())
+            if output.trace is None:
+                continue
+            self.edge_freq.update(output.trace.hit)
+            if not output.trace.operands <= self._in_dictionary:
+                self._extend_dictionary(output.trace.operands)
             if output.message in ("assertion error", "timeout"):
                 continue
-            depth = output.depth
+            classified = output.trace.classified()
+            path = fingerprint(classified)
+
+            if self.coverage.update(classified):
+                idle = 0
+                self._record(path, candidate, output, path)
+                self._reweight()
+            elif path in self.corpus and self._is_smaller(candidate, self.corpus[path]):
+                self._record(path, candidate, output, path)
+            self._handle_crash(candidate, output, min_depth)
 
-            if depth not in self.corpus:
-                self._handle_new_coverage(candidate, output, depth, min_depth)
-                if len(self.wrong_inputs) >= max_errors:
-                    break
-            elif self._is_smaller(candidate, self.corpus[depth]):
-                self.corpus[depth] = candidate
+        self.save_corpus()
 
     def fuzz_print(self):
         if self.coverage_based:
             for _ in range(self.fuzz_for):
-                input = self.mutate(deepcopy(random.choice(list(self.corpus.values()))))
-                if input == [10, 12]:
-                    print(input)
-                output = interpret(self.method, self.format_input(input), False, assertions_disabled=True)
+                input = self.mutate(self.corpus.choice())
+                output = interpret(self.method, self.to_input(input), False, assertions_disabled=True)
                 if output.depth not in self.corpus:
                     print(f"New input: {input} with depth: {output.depth}")
                     print(f"{input} -> {output.message}")
@@ -376,7 +500,7 @@ class Fuzzer:
         else:
             for _ in range(self.fuzz_for):
                 input = self.random_input()
-                output = interpret(method_id, self.format_input(input), False)
+                output = interpret(self.method, self.to_input(input), False)
                 if(output.message != "ok"):
                     self.error_map[output.depth] = input
                     print(f"{input} --> {output.message}:{output.depth}")
@@ -0,0 +1,343 @@
+"""
+Typed input schema of a method, decoded from its descriptor.
+
+Every parameter type (a `jvm.Type`, or a `Constructed` for the `Lname<init>ARGS;`
+parameters of the benchmark) has a codec that generates, mutates and encodes the
+fuzzer's representation of its values: primitives are plain python values, arrays
+are tuples of elements and objects are tuples of constructor arguments.
+
+Codecs are built once per type and shared, so the per-value work is a single
+method call instead of re-inspecting the descriptor.
+
+Usage: codecs = [codec(t) for t in decode_params("jpamb.cases.Arrays.arraySpellsHello:([C)V")]
+       x = tuple(c.generate(rng) for c in codecs)
+       inputs = Input(tuple(c.to_value(v) for c, v in zip(codecs, x)))
+"""
+import random
+import string
+from dataclasses import dataclass
+from functools import lru_cache
+from jpamb import jvm
+
+MAX_ARRAY_SIZE = 50
+# chars the deterministic mutations keep to
+SAFE_CHARS = string.ascii_letters + string.digits
+
+
+@dataclass(frozen=True)
+class Constructed:
+    """An object parameter, built by calling the constructor with `params`."""
+    classname: jvm.ClassName
+    params: tuple
+
+    @property
+    def name(self) -> str:
+        return self.classname.slashed()
+
+    @property
+    def init_params(self) -> tuple:
+        return self.params
+
+
+ParamType = jvm.Type | Constructed
+
+
+@lru_cache(maxsize=None)
+def decode_params(descriptor: str) -> tuple[ParamType, ...]:
+    """
+    The parameter types of a method id (or of a bare parameter list such as "I[[C").
+    Object parameters keep their constructor signature: "Ljpamb/utils/Pair<init>I[I;"
+    becomes Constructed(jpamb.utils.Pair, (Int(), Array(Int()))).
+    """
+    if "(" in descriptor:
+        descriptor = descriptor[descriptor.index("(") + 1 : descriptor.index(")")]
+    params = []
+    while descriptor:
+        t, rest = jvm.Type.decode(descriptor)
+        if isinstance(t, jvm.Object):
+            consumed = descriptor[: len(descriptor) - len(rest)]
+            signature = consumed[consumed.index("<init>") + 6 : -1]
+            t = Constructed(t.name, tuple(jvm.ParameterType.decode(signature)))
+        params.append(t)
+        descriptor = rest
+    return tuple(params)
+
+
+class Codec:
+    """Generators, mutators and encoders for the values of one parameter type."""
+    type: ParamType
+
+    def generate(self, rng: random.Random): ...
+
+    def default(self): ...
+
+    def deterministic(self, x, rng: random.Random, dictionary: list[int]): ...
+
+    def havoc(self, x, rng: random.Random, dictionary: list[int]): ...
+
+    def to_value(self, x, boxed: bool = False) -> jvm.Value: ...
+
+    def encode(self, x) -> str:
+        """
+        A readable rendering of the value, for reports. Primitives and flat int/char
+        arrays are in the string syntax of `jvm.Value.decode`; nested arrays and objects
+        are not parsed back by it, so values are passed to `interpret` via `to_value`.
+        """
+        return str(x)
+
+    def from_raw(self, x):
+        """The value from a hand-written or generated argument (tagged lists allowed)."""
+        return x
+
+
+class IntCodec(Codec):
+    def __init__(self, t: jvm.Type, lo: int, hi: int):
+        self.type, self.lo, self.hi = t, lo, hi
+
+    def generate(self, rng):
+        return rng.randint(self.lo, self.hi)
+
+    def default(self):
+        return 0
+
+    def deterministic(self, x, rng, dictionary):
+        match rng.randrange(3):
+            case 0:
+                return x ^ (1 << rng.randint(0, 7))
+            case 1:
+                return x + rng.randint(-100, 100)
+        return rng.choice(dictionary)
+
+    def havoc(self, x, rng, dictionary):
+        match rng.randrange(4):
+            case 0:
+                return x + rng.randint(-100, 100)
+            case 1:
+                return x * 2
+            case 2:
+                return x // 2 if x else x
+        return rng.choice(dictionary)
+
+    def to_value(self, x, boxed=False):
+        # short and byte values live in int slots, like on the operand stack
+        if self.type is jvm.Long():
+            return jvm.Value(self.type, x)
+        return jvm.Value.int(x)
+
+
+class FloatCodec(Codec):
+    def __init__(self, t: jvm.Type):
+        self.type = t
+
+    def generate(self, rng):
+        return round(rng.uniform(-1000, 1000), 3)
+
+    def default(self):
+        return 0.0
+
+    def deterministic(self, x, rng, dictionary):
+        match rng.randrange(3):
+            case 0:
+                return x * x
+            case 1:
+                return x + rng.randint(-100, 100)
+        return float(rng.choice(dictionary))
+
+    def havoc(self, x, rng, dictionary):
+        match rng.randrange(4):
+            case 0:
+                return x + rng.randint(-100, 100)
+            case 1:
+                return x * 2
+            case 2:
+                return x / 2
+        return float(rng.choice(dictionary))
+
+    def to_value(self, x, boxed=False):
+        return jvm.Value(self.type, x)
+
+
+class BoolCodec(Codec):
+    type = jvm.Boolean()
+
+    def generate(self, rng):
+        return rng.choice([True, False])
+
+    def default(self):
+        return False
+
+    def deterministic(self, x, rng, dictionary):
+        return x & rng.choice([True, False])
+
+    def havoc(self, x, rng, dictionary):
+        return not x
+
+    def to_value(self, x, boxed=False):
+        return jvm.Value.boolean(x)
+
+    def encode(self, x):
+        return "true" if x else "false"
+
+
+class CharCodec(Codec):
+    type = jvm.Char()
+
+    def generate(self, rng):
+        return rng.choice(string.ascii_letters)
+
+    def default(self):
+        return "a"
+
+    def deterministic(self, x, rng, dictionary):
+        c = chr(ord(x) ^ (1 << rng.randint(0, 6)))
+        return c if c in SAFE_CHARS else rng.choice(SAFE_CHARS)
+
+    def havoc(self, x, rng, dictionary):
+        match rng.randrange(4):
+            case 0:
+                return chr(rng.randint(32, 126))
+            case 1:
+                # a dictionary value as a char, if it is one
+                d = rng.choice(dictionary)
+                return chr(d) if 0 <= d <= 0xFFFF else x
+            case 2:
+                return x.swapcase()
+        return chr(min(max(ord(x) + rng.choice([-1, 1]), 0), 0xFFFF))
+
+    def to_value(self, x, boxed=False):
+        return jvm.Value.char(x)
+
+    def encode(self, x):
+        return f"'{x}'"
+
+
+class ArrayCodec(Codec):
+    def __init__(self, t: jvm.Array, elem: Codec):
+        self.type, self.elem = t, elem
+        # rows of nested arrays are placed on the heap by themselves, so they stay jvm values
+        self.nested = isinstance(elem, ArrayCodec)
+
+    def generate(self, rng):
+        return tuple(self.elem.generate(rng) for _ in range(rng.randint(0, MAX_ARRAY_SIZE)))
+
+    def default(self):
+        return ()
+
+    def deterministic(self, x, rng, dictionary):
+        return tuple(self.elem.deterministic(v, rng, dictionary) for v in x)
+
+    def havoc(self, x, rng, dictionary):
+        match rng.randrange(6):
+            case 0:
+                return x + (self.elem.generate(rng),)
+            case 1:
+                return self._resize(x, rng, dictionary)
+            case 2:
+                return x[:-1]
+            case 3:
+                return x + x
+            case 4:
+                return x[::-1]
+        if not x:
+            return x
+        i = rng.randrange(len(x))
+        return x[:i] + (self.elem.havoc(x[i], rng, dictionary),) + x[i + 1:]
+
+    def _resize(self, x, rng, dictionary):
+        """Resize to a length from the dictionary, padding with fresh elements."""
+        lengths = [d for d in dictionary if 0 <= d <= MAX_ARRAY_SIZE]
+        n = rng.choice(lengths) if lengths else rng.randint(0, MAX_ARRAY_SIZE)
+        return x[:n] + tuple(self.elem.generate(rng) for _ in range(n - len(x)))
+
+    def to_value(self, x, boxed=False):
+        # constructor arguments carry their array elements as jvm values
+        if boxed or self.nested:
+            x = [self.elem.to_value(v, boxed) for v in x]
+        return jvm.Value.array(self.elem.type, x)
+
+    def encode(self, x):
+        return f"[{self.elem.type.encode()}:" + ",".join(self.elem.encode(v) for v in x) + "]"
+
+    def from_raw(self, x):
+        # tagged lists carry the element type in front
+        elems = x[1:] if isinstance(x, list) else x
+        return tuple(self.elem.from_raw(v) for v in elems)
+
+
+class ConstructedCodec(Codec):
+    def __init__(self, t: Constructed, params: tuple[Codec, ...]):
+        self.type, self.params = t, params
+
+    def generate(self, rng):
+        return tuple(p.generate(rng) for p in self.params)
+
+    def default(self):
+        return tuple(p.default() for p in self.params)
+
+    def deterministic(self, x, rng, dictionary):
+        return tuple(p.deterministic(a, rng, dictionary) for p, a in zip(self.params, x))
+
+    def havoc(self, x, rng, dictionary):
+        return tuple(p.havoc(a, rng, dictionary) for p, a in zip(self.params, x))
+
+    def to_value(self, x, boxed=False):
+        args = [p.to_value(a, boxed=True) for p, a in zip(self.params, x)]
+        return jvm.Value.object({"value": args}, self.type.classname)
+
+    def encode(self, x):
+        return f"new {self.type.name}(" + ",".join(p.encode(a) for p, a in zip(self.params, x)) + ")"
+
+    def from_raw(self, x):
+        # tagged lists carry the class name in front
+        args = x[1:] if isinstance(x, list) else x
+        return tuple(p.from_raw(a) for p, a in zip(self.params, args))
+
+
+@lru_cache(maxsize=None)
+def codec(t: ParamType) -> Codec:
+    """The (shared) codec of a parameter type."""
+    match t:
+        case Constructed(params=params):
+            return ConstructedCodec(t, tuple(codec(p) for p in params))
+        case jvm.Array(contains=contains):
+            return ArrayCodec(t, codec(contains))
+        case jvm.Boolean():
+            return BoolCodec()
+        case jvm.Char():
+            return CharCodec()
+        case jvm.Int() | jvm.Short():
+            return IntCodec(t, -1000, 1000)
+        case jvm.Byte():
+            return IntCodec(t, -128, 127)
+        case jvm.Long():
+            return IntCodec(t, -10 ** 5, 10 ** 5)
+        case jvm.Float() | jvm.Double():
+            return FloatCodec(t)
+    raise ValueError(f"No input codec for parameter type {t}")
+
+
+def symbolic_type(t: ParamType) -> jvm.Type:
+    """
+    The primitive type the symbolic analysis assigns to a parameter: arrays stand
+    for their elements, objects for their last constructor argument.
+    """
+    match t:
+        case Constructed(params=params) if params:
+            return symbolic_type(params[-1])
+        case Constructed():
+            return jvm.Int()
+        case jvm.Array(contains=contains):
+            return symbolic_type(contains)
+    return t
+
+
+def from_symbolic(t: ParamType, value):
+    """A full value of type `t` around the solved value of its symbolic type (see `symbolic_type`)."""
+    match t:
+        case Constructed(params=params) if params:
+            return codec(t).default()[:-1] + (from_symbolic(params[-1], value),)
+        case Constructed():
+            return ()
+        case jvm.Array(contains=contains):
+            return (from_symbolic(contains, value),)
+    return value
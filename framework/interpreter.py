@@ -22,6 +22,8 @@ from jpamb import jvm
 
 from symbolic_execution import analyse
 from corpus_generator import generate_corpus
+from coverage import Trace
+from input_schema import decode_params
 
 from jpamb import jvm, parse_methodid
 
@@ -42,47 +44,14 @@ def wrap_value(value: any) -> jvm.Value:
         case _:
             raise TypeError(f"Do not know how to wrap {value!r}")
 
-def return_value_given_str(input: str):
-    arg = None
-    if re.match(r"^([0-9]+)$", input):
-        arg = jvm.Value.int(int(input))
-    elif re.search(r'\[([IC]):\s*([^]]+)\]', input):
-        arr_match = re.search(r'\[([IC]):\s*([^]]+)\]', input)
-        arr_type = arr_match.group(1)
-        arr_content = arr_match.group(2)
-
-        cleaned = arr_content.strip('()').split(',')
-        args_str_list = [item.strip() for item in cleaned]
-        args_list = []
-
-        if arr_type == 'I':
-            for integer in args_str_list:
-                args_list.append(jvm.Value.int(int(integer)))
-            arg = jvm.Value.array(jvm.Int(), args_list)
-        elif arr_type == 'C':
-            for character in args_str_list:
-                args_list.append(jvm.Value.char(character))
-            arg = jvm.Value.array(jvm.Char(), args_list)
-        else:
-            raise ValueError("Unsupported array type for object's constuctor input")
-    elif re.match(r"^([^0-9,])$", input):
-        arg = jvm.Value.char(input)
-    else:
-        raise ValueError("Unsupported type of input to the object's constructor")
-    return arg
-
-
 @dataclass
 class InterpretationResult:
-    def __init__(self, message: str, depth):
+    def __init__(self, message: str, depth, trace: Trace | None = None):
         self.depth = depth
         self.message = message
-
-@dataclass
-class CustomType:
-    def __init__(self, name, params):
-        self.name = name
-        self.init_params = params
+        self.trace = trace
+        # (method, offset) of every frame when the execution ended, innermost last
+        self.stack = ()
 
 @dataclass
 class PC:
@@ -298,10 +267,11 @@ def _invoke_special_method(method: jvm.AbsMethodID, is_interface: bool, state: S
     state.frames.push(new_frame)
     return state
 
-def step(state: State, bytecode: Bytecode, assertions_disabled: bool = False) -> State | InterpretationResult:
+def step(state: State, bytecode: Bytecode, assertions_disabled: bool = False, trace: Trace | None = None) -> State | InterpretationResult:
     """
     Stepping function:
     bc ⊢ ⟨η,μ⟩ → ⟨η‾,μ‾⟩
+    The operands of the executed comparisons are recorded in `trace`, if given.
     """
     frame = state.frames.peek()
 
@@ -435,6 +405,8 @@ def step(state: State, bytecode: Bytecode, assertions_disabled: bool = False) ->
             v2 = 0
         else:
             v2, v1 = frame.stack.pop().value, frame.stack.pop().value
+        if trace is not None:
+            trace.compare(v1, v2)
         match condition:
             case 'ne':
                 jump = v1 != v2
@@ -807,8 +779,35 @@ def configure_logger():
     logger.add(sys.stderr, format="[{level}] {message}")
 
 
-def generate_initial_state(method_id: jvm.AbsMethodID, method_input: Input, method_input_str: str, bytecode: Bytecode, assertions_disabled: bool=False) -> State:
-    """Generates the initial frame from the given method id and method input"""
+# (class, constructor args, first free ref, assertions disabled) -> heap entries created by
+# running that constructor, so repeated inputs skip the constructor (oldest evicted first)
+_CONSTRUCTED: dict[tuple, dict[int, jvm.Value]] = {}
+MAX_CONSTRUCTED = 4096
+
+
+def _snapshot_key(class_name: jvm.ClassName, constructor_args, ref: int, assertions_disabled: bool):
+    """Key of a constructor snapshot, None if the arguments cannot be hashed."""
+    key = (class_name, tuple(constructor_args), ref, assertions_disabled)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _copy_heap_value(value: jvm.Value) -> jvm.Value:
+    """A copy of a heap value that is safe to mutate: objects get their own field dict, everything else is immutable."""
+    if isinstance(value.value, dict):
+        return jvm.Value(value.type, dict(value.value))
+    return value
+
+
+def generate_initial_state(method_id: jvm.AbsMethodID, method_input: Input, bytecode: Bytecode, assertions_disabled: bool=False) -> State:
+    """
+    Generates the initial frame from the given method id and method input.
+    Object parameters carry their constructor arguments as jvm values (see `jvm.Value.object`),
+    the constructor is run before the method starts.
+    """
     initial_frame = Frame.from_method(method_id)
     heap = {}
     state = State(heap, Stack.empty().push(initial_frame))
@@ -824,56 +823,64 @@ def generate_initial_state(method_id: jvm.AbsMethodID, method_input: Input, meth
         #         assert False, f"Do not know how to handle {value}"
 
         #check if it is of type of custom class
-        m = re.match(r"^L([A-Za-z0-9_/\$]+);$",str(value.type))
-
-        if m is not None:
+        if isinstance(value.type, jvm.Object):
             #custom class found
             current_frame = state.frames.peek()
 
             #----------new command
-            class_name_str = m.group(1)
-            class_name = jvm.ClassName(class_name_str)
-
-            obj_value = _new_get_obj_value(class_name)
+            class_name_str = value.type.name.slashed()
+            class_name = jvm.ClassName.decode(class_name_str)
 
             ref = max(heap.keys()) + 1 if heap else 0
-            #on the heap, the object will already have a predetermined value, but if we run the constructor anyway then it doesn't really matter
-            obj_value = _new_get_obj_value(class_name)
-            heap[ref] = obj_value
-            current_frame.locals[index] = jvm.Value.int(ref)        # it needs this part - to be able to read the reference later
-            locals_for_new_frame.append(jvm.Value.int(ref))
-            current_frame.stack.push(jvm.Value.int(ref))
-
-            #----------dup-----------
-            current_frame.stack.push(current_frame.stack.peek())
-            #---------push-----------
-            constuctor_parameters_str_all_matches = re.findall(r'\(([^()]+)\)', method_input_str)
-            assert len(constuctor_parameters_str_all_matches) > index, f"Not enough matches. Expected at least {index+1}, found {len(constuctor_parameters_str_all_matches)}"
-            constructor_parameters_str = constuctor_parameters_str_all_matches[index]
-
-            constructor_parameters_str_list = [p.strip() for p in constructor_parameters_str.split(',')]                    #it should push one parameter at the time  
-            push_values_types = []
-            for constructor_parameter_str in constructor_parameters_str_list:
-                push_value = return_value_given_str(constructor_parameter_str)
-                current_frame.stack.push(push_value)                                    #here, we need to push constructor input values (form actual user input) on to the stack
-                push_values_types.append(push_value.type.encode())
-
-            #-------invoke special-------------
-            input_types_combined = "".join(push_values_types)
-            constructor_method_id_str = class_name_str + ".<init>:(" + input_types_combined + ")V"        #for now, we assume that all constructors will return void
-            constructor_method_id = jvm.AbsMethodID.decode(constructor_method_id_str)
-            state = _invoke_special_method(constructor_method_id, False, state, current_frame)
-
-            target_depth = len(state.frames.items)
-
-            for x in range(100_000):
-                state = step(state, bytecode, assertions_disabled)
-
-                if isinstance(state, InterpretationResult):
-                    break
+            constructor_args = value.value["value"]
+            key = _snapshot_key(class_name, constructor_args, ref, assertions_disabled)
+            snapshot = _CONSTRUCTED.get(key) if key is not None else None
+
+            if snapshot is not None:
+                # same constructor call on the same heap layout: start from a copy of its result
+                heap.update((r, _copy_heap_value(v)) for r, v in snapshot.items())
+                locals_for_new_frame.append(jvm.Value.int(ref))
+            else:
+                #on the heap, the object will already have a predetermined value, but if we run the constructor anyway then it doesn't really matter
+                obj_value = _new_get_obj_value(class_name)
+                heap[ref] = obj_value
+                current_frame.locals[index] = jvm.Value.int(ref)        # it needs this part - to be able to read the reference later
+                locals_for_new_frame.append(jvm.Value.int(ref))
+                current_frame.stack.push(jvm.Value.int(ref))
+
+                #----------dup-----------
+                current_frame.stack.push(current_frame.stack.peek())
+                #---------push-----------
+                for push_value in constructor_args:
+                    current_frame.stack.push(push_value)                                    #here, we need to push constructor input values (form actual user input) on to the stack
+
+                #-------invoke special-------------
+                #for now, we assume that all constructors will return void
+                constructor_method_id = jvm.intern(jvm.AbsMethodID(
+                    classname=class_name,
+                    extension=jvm.MethodID("<init>", jvm.ParameterType(tuple(v.type for v in constructor_args)), None),
+                ))
+                state = _invoke_special_method(constructor_method_id, False, state, current_frame)
+
+                target_depth = len(state.frames.items)
+
+                returned = False
+                for x in range(100_000):
+                    state = step(state, bytecode, assertions_disabled)
+
+                    if isinstance(state, InterpretationResult):
+                        break
                 
-                if len(state.frames.items) < target_depth:
-                    break
+                    if len(state.frames.items) < target_depth:
+                        returned = True
+                        break
+
+                # only a constructor that returned leaves a heap worth reusing, one that
+                # threw or ran out of steps is run again for every input
+                if key is not None and returned:
+                    if len(_CONSTRUCTED) >= MAX_CONSTRUCTED:
+                        del _CONSTRUCTED[next(iter(_CONSTRUCTED))]
+                    _CONSTRUCTED[key] = {r: _copy_heap_value(v) for r, v in heap.items() if r >= ref}
 
             #--- so now we skip the interpreter at all, and "force" the initial frame - since the constructor was already checked
             #----simply instate the initial frame again - with out heap
@@ -885,6 +892,18 @@ def generate_initial_state(method_id: jvm.AbsMethodID, method_input: Input, meth
             state = State(heap, Stack.empty().push(initial_frame))
             # print("STATE: ", state)
 
+        elif isinstance(value.type, jvm.Array) and isinstance(value.type.contains, jvm.Array):
+            # rows first, then the outer array of row refs (the layout `_new_matrix` builds)
+            rows = []
+            for row in value.value:
+                rows.append(len(heap))
+                heap[len(heap)] = row
+            ref = len(heap)
+            heap[ref] = jvm.Value.array(value.type.contains, rows)
+            initial_frame.locals[index] = jvm.Value.int(ref)
+
+            state = State(heap, Stack.empty().push(initial_frame))
+
         else:
             local = wrap_value(value.value)
             if isinstance(local.type, jvm.Array):
@@ -910,39 +929,27 @@ def input_is_an_object() -> bool:
     return False
 
 
-def interpret(method, inputs, verbose=False, corpus=False, assertions_disabled=False) -> InterpretationResult:
+def interpret(method: str | jvm.AbsMethodID, inputs: str | Input, verbose=False, corpus=False, assertions_disabled=False, trace: Trace | None = None) -> InterpretationResult:
+    """
+    Interpret `method` on `inputs`.
+    Both can be given either encoded (strings, as on the command line) or already
+    decoded (`jvm.AbsMethodID` / `Input`), the latter skips parsing on every call.
+    If a `trace` is given, every executed edge and the final outcome are recorded in
+    it, and it is attached to the result.
+    """
     if not verbose:
         logger.remove()
 
     if corpus:
-        analyse_method_input = []
-        params = method[method.index('(') + 1:method.index(')')]
-        method_params = params
-        primitive_params = ""
-        params_count = 0
-        while len(params) > 0:
-            if params[0] == 'L':
-                analyse_method_input.append((chr(ord('a') + params_count), jvm.Char()))
-                primitive_params += params[params.find(';') -1: params.find(';')]
-                params = params[params.find(';') + 1:]
-                params_count += 1
-            elif params[0] == '[':
-                params = params[2:]
-                primitive_params += params[0:2]
-                analyse_method_input.append((chr(ord('a') + params_count), jvm.Char()))
-                params_count += 1
-            else:
-                primitive_params += params[0]
-                analyse_method_input.append((chr(ord('a') + params_count), jvm.Char()))
-                params = params[1:]
-                params_count +=1
+        method_params = decode_params(method)
+        analyse_method_input = [(chr(ord('a') + i), jvm.Char()) for i in range(len(method_params))]
         try:
             branches = analyse(PC(parse_methodid(method), 0), analyse_method_input, 50)
             # for branch in branches:
             #     print(branch)
             # print(primitive_params)
             # print(analyse_method_input)
-            new_corpus = generate_corpus(branches, primitive_params, method_params)
+            new_corpus = generate_corpus(branches, method_params)
         except ValueError as e:
             raise ValueError(f"Corpus generation error: {e} occured when generating a new corpus")
 
@@ -951,26 +958,44 @@ def interpret(method, inputs, verbose=False, corpus=False, assertions_disabled=F
         bc = Bytecode(jpamb.Suite(Path(__file__).parent.joinpath("../")), {})
 
         try:
-            mid, minput = jpamb.getcasefromparams(method, inputs)
+            mid = method if isinstance(method, jvm.AbsMethodID) else parse_methodid(method)
+            minput = inputs if isinstance(inputs, Input) else jpamb.parse_input(inputs)
         except ValueError as e:
             return InterpretationResult(f"{e}", 0)
 
-        mininput_str = inputs
         try:
-            state = generate_initial_state(mid, minput, mininput_str, bc, assertions_disabled)
+            state = generate_initial_state(mid, minput, bc, assertions_disabled)
         except Exception as e:
             return InterpretationResult("generic error", 0)
 
+        if trace is not None:
+            pc = state.frames.peek().pc
+            trace.visit(pc.method, pc.offset)
+
         for i in range(10_000):
             # print(f"------- step {i} ------------")
+            frames = state.frames.items
             try:
-                state = step(state, bc, assertions_disabled)
+                state = step(state, bc, assertions_disabled, trace)
             except Exception as e:
-                return InterpretationResult("generic error", 0)
+                result = InterpretationResult("generic error", 0)
+                break
             if isinstance(state, InterpretationResult):
-                return state
+                result = state
+                break
+            if trace is not None:
+                pc = state.frames.peek().pc
+                trace.visit(pc.method, pc.offset)
         else:
-            return InterpretationResult("timeout", state.frames.peek().pc.offset)
+            frames = state.frames.items
+            result = InterpretationResult("timeout", state.frames.peek().pc.offset)
+
+        result.stack = tuple((f.pc.method, f.pc.offset) for f in frames)
+        if trace is not None:
+            # the outcome is an edge too, so different errors at the same pc count as new coverage
+            trace.visit(mid, result.message)
+            result.trace = trace
+        return result
 
 # print(interpret("jpamb.cases.BenchmarkSuite.safeArrayAccessNested:(Ljpamb/utils/PositiveInteger<init>I;I)V", "(new jpamb/utils/PositiveInteger(2),223)", corpus=True))
 
@@ -988,8 +1013,7 @@ if __name__ == "__main__":
         bc = Bytecode(jpamb.Suite(Path(__file__).parent.joinpath("../")), {})
 
         mid, minput = jpamb.getcase()
-        mininput_str = sys.argv[2]
-        state = generate_initial_state(mid, minput,mininput_str,bc)
+        state = generate_initial_state(mid, minput, bc)
 
         for _ in range(100_000):
             state = step(state, bc)
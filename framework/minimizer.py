@@ -0,0 +1,133 @@
+"""
+Delta-debugging minimizer for crashing fuzzer inputs.
+
+Shrinks an input (a tuple typed by the fuzzer's parameter schema) while the
+interpreter keeps reporting the same message at the same depth: arrays lose
+elements ddmin-style, integers move toward zero, chars toward 'a', booleans
+toward false, and constructor arguments are shrunk field by field. The number
+of executions is bounded, the best input found so far is returned when the
+budget runs out.
+
+Usage: smallest = minimize(crashing_input, fuzzer.method_params,
+                           lambda x: fuzzer._run(x, assertions_disabled=False))
+"""
+from typing import Callable
+from jpamb import jvm
+from input_schema import Constructed
+
+# executions one minimization may spend
+MINIMIZE_BUDGET = 500
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class Minimizer:
+    def __init__(self, params, run: Callable, budget: int = MINIMIZE_BUDGET):
+        self.params = params
+        self.run = run
+        self.budget = budget
+        self.executions = 0
+        self.target = None
+        self.best = None
+        self._seen = {}
+
+    def _fails(self, candidate) -> bool:
+        """Does `candidate` reproduce the target result? Successes become the new best input."""
+        if candidate in self._seen:
+            return self._seen[candidate]
+        if self.executions >= self.budget:
+            raise _BudgetExhausted
+        self.executions += 1
+        out = self.run(candidate)
+        fails = (out.message, out.depth) == self.target
+        self._seen[candidate] = fails
+        if fails:
+            self.best = candidate
+        return fails
+
+    def minimize(self, input):
+        out = self.run(input)
+        self.target = (out.message, out.depth)
+        self.best = input
+        try:
+            # repeat until a whole pass over the fields changes nothing
+            while True:
+                before = self.best
+                self._shrink_fields(self.best, self.params, lambda values: values)
+                if self.best == before:
+                    break
+        except _BudgetExhausted:
+            pass
+        return self.best
+
+    def _shrink_fields(self, values, types, embed):
+        """
+        Shrink every field of `values` (typed by `types`) in turn.
+        `embed` places a candidate for `values` into a full input.
+        """
+        for i, t in enumerate(types):
+            # late binding on purpose: `values` already holds the fields shrunk so far
+            def place(v, i=i):
+                return embed(values[:i] + (v,) + values[i + 1:])
+            values = values[:i] + (self._shrink_value(values[i], t, place),) + values[i + 1:]
+        return values
+
+    def _shrink_value(self, x, t, place):
+        match t:
+            case Constructed(params=params):
+                return self._shrink_fields(x, params, place)
+            case jvm.Array(contains=contains):
+                elems = self._ddmin(x, place)
+                return self._shrink_fields(elems, (contains,) * len(elems), place)
+            case jvm.Boolean():
+                return False if x and self._fails(place(False)) else x
+            case jvm.Char():
+                return 'a' if x != 'a' and self._fails(place('a')) else x
+            case jvm.Float() | jvm.Double():
+                for v in (0.0, float(int(x))):
+                    if v != x and self._fails(place(v)):
+                        return v
+                return x
+        return self._shrink_int(x, place)
+
+    def _shrink_int(self, x, place):
+        """Smallest magnitude on the same side of zero that still fails (binary search)."""
+        if x == 0:
+            return x
+        if self._fails(place(0)):
+            return 0
+        sign = 1 if x > 0 else -1
+        lo, hi = 0, abs(x)  # lo passes, hi fails
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self._fails(place(sign * mid)):
+                hi = mid
+            else:
+                lo = mid
+        return sign * hi
+
+    def _ddmin(self, elems, place):
+        """Remove chunks of the array (halving the chunk size) while it still fails."""
+        if elems and self._fails(place(())):
+            return ()
+        n = 2
+        while len(elems) >= 2:
+            chunk = -(-len(elems) // n)
+            for start in range(0, len(elems), chunk):
+                complement = elems[:start] + elems[start + chunk:]
+                if self._fails(place(complement)):
+                    elems = complement
+                    n = max(n - 1, 2)
+                    break
+            else:
+                if n >= len(elems):
+                    break
+                n = min(n * 2, len(elems))
+        return elems
+
+
+def minimize(input, params, run: Callable, budget: int = MINIMIZE_BUDGET):
+    """Shrink `input` while `run` keeps giving the same message and depth."""
+    return Minimizer(params, run, budget).minimize(input)
@@ -2,8 +2,8 @@
 Assertion solver module based on:
 https://microsoft.github.io/z3guide/programming/Z3%20Python%20-%20Readonly/Introduction/.
 """
-from .solver import AssertSolver, SolveResult
+from .solver import AssertSolver, SolveResult, Sampling
 from .invoker import GenerationInvoker
-from .utils import node_text, translate_expression
+from .utils import node_text, translate_expression, compile_expression, build_expression, expression_variables
 
-__all__ = ["AssertSolver", "SolveResult", "node_text", "translate_expression", "GenerationInvoker"]
+__all__ = ["AssertSolver", "SolveResult", "Sampling", "node_text", "translate_expression", "compile_expression", "build_expression", "expression_variables", "GenerationInvoker"]
@@ -1,100 +1,59 @@
 """Generation   Invoker module"""
 import random
-import string
 from typing import Dict, Any
 import z3
+from jpamb import jvm
+from jpamb.model import Input
 from interpreter import interpret, InterpretationResult
-
-
-class CustomType:
-    """Custom Type wrapper"""
-    def __init__(self, name, init_params):
-        self.name = name
-        self.init_params = init_params
+from input_schema import Constructed, codec, decode_params
 
 
 class GenerationInvoker:
     """
     Generates method invocation arguments using:
-    - CustomType support
+    - constructed object parameters (see `input_schema`)
     - Z3 model values
     - Fuzzer fallback for missing params
     """
 
-    def __init__(self, method_id: str):
+    def __init__(self, method_id: str, rng: random.Random | None = None):
         self.method_id = method_id
+        # stream for the values of parameters missing from the model
+        self.rng = rng if rng is not None else random.Random()
+        self.abs_method_id = jvm.AbsMethodID.decode(method_id)
         self.param_types = self._parse_params(method_id)
 
     def _parse_params(self, method_id):
-        """Parse primitives and CustomType with <init> signature params."""
-        inside = method_id[method_id.index("(") + 1 : method_id.index(")")]
-        out = []
-        i = 0
-
-        while i < len(inside):
-            if inside[i] == "L":
-                semi = inside.index(";", i)
-                descriptor = inside[i+1:semi]
-                cname = descriptor[:descriptor.index("<init>")]
-                ctor_sig = descriptor[descriptor.index("<init>") + 6 :]
-
-                init_params = list(ctor_sig)
-                out.append(CustomType(cname, init_params))
-                i = semi + 1
-            else:
-                out.append(inside[i])
-                i += 1
-
-        return out
+        """Parameter types, objects with their <init> signature params."""
+        return decode_params(method_id)
 
     def _random_primitive(self, t):
         """Random primitive param (fuzzer fallback)."""
-        match t:
-            case "I": return random.randint(-10000, 10000)
-            case "S": return random.randint(-1000, 1000)
-            case "B": return random.randint(-128, 127)
-            case "Z": return random.choice([True, False])
-            case "C": return random.choice(string.ascii_letters)
-            case "F": return round(random.uniform(-1000, 1000), 3)
-            case "D": return round(random.uniform(-10000, 10000), 3)
-        return None
-
-    def _build_custom_type(self, ct: CustomType, params: list[Any]):
-        """Build a Custom Type instance from the given parameters."""
-        return [ct.name] + params
+        return codec(t).generate(self.rng)
 
-    def _generate_custom_type(self, ct: CustomType):
-        """Generate a Custom Type instance using fuzzer logic."""
-        return [ct.name] + [self._random_primitive(t) for t in ct.init_params]
+    def _generate_custom_type(self, ct: Constructed):
+        """Generate the constructor arguments of an object param using fuzzer logic."""
+        return codec(ct).generate(self.rng)
 
     def _convert_z3_value(self, z3val: z3.ExprRef, expected_type):
         """Convert from Z3 value to python value"""
-        if isinstance(expected_type, CustomType):
-            vals = []
-            for t in expected_type.init_params:
-                vals.append(self._convert_z3_value(z3val, t))
-            return [expected_type.name] + vals
-
-        if str(expected_type) in {"I", "S", "B", "C"}:
-            return int(z3val.as_long())
-        if expected_type == "Z":
-            return bool(z3val.as_long())
-        if expected_type in {"F", "D"}:
-            return float(z3val.as_decimal(10))
+        match expected_type:
+            case Constructed(params=params):
+                return tuple(self._convert_z3_value(z3val, t) for t in params)
+            case jvm.Int() | jvm.Short() | jvm.Byte() | jvm.Long():
+                return int(z3val.as_long())
+            case jvm.Char():
+                return chr(z3val.as_long())
+            case jvm.Boolean():
+                return z3.is_true(z3val)
+            case jvm.Float() | jvm.Double():
+                return float(z3val.as_decimal(10).rstrip("?"))
 
         return None
 
-    def _fmt(self, v):
-        """Format value to str for interpret()"""
-        if isinstance(v, str):
-            return f"'{v}'"
-        if isinstance(v, bool):
-            return "true" if v else "false"
-        if isinstance(v, list):
-            classname = v[0]
-            args = ",".join(self._fmt(x) for x in v[1:])
-            return f"new {classname}({args})"
-        return str(v)
+    def _to_value(self, v, spec) -> jvm.Value:
+        """Convert a generated python value to the jvm value the interpreter expects."""
+        return codec(spec).to_value(v)
 
     def build_arguments(self, param_order: list[str], model, z3_vars: Dict[str, Any]):
         """Build full argument list using model and fuzzer fallback."""
@@ -115,13 +74,13 @@ class GenerationInvoker:
             # If Z3 has a value for this custom type parameter -> use it
             if f"{pname}.get()" in z3_vars and model:
                 z3val = model.get_interp(z3_vars[f"{pname}.get()"])
-                if z3val is not None and isinstance(spec, CustomType):
+                if z3val is not None and isinstance(spec, Constructed):
                     custom_obj = self._convert_z3_value(z3val, spec)
                     final.append(custom_obj)
                     continue
 
             # Otherwise, generate default value
-            if isinstance(spec, CustomType):
+            if isinstance(spec, Constructed):
                 final.append(self._generate_custom_type(spec))
             else:
                 final.append(self._random_primitive(spec))
@@ -129,7 +88,7 @@ class GenerationInvoker:
         return final
 
     def invoke(self, param_order, model, z3_vars, max_attempts=10) -> InterpretationResult:
-        """Build arguments, formats, and invokes the interpreter."""
+        """Build arguments, and invokes the interpreter with them (as jvm values, no formatting)."""
         # print("PARAM_ORDER:", param_order)
         # print("MODEL:", model)
         # print("z3_vars:", z3_vars)
@@ -137,11 +96,16 @@ class GenerationInvoker:
         # try max_attempts times if the problem is with the generated params (useful for Custom Type args)
         for _ in range(max_attempts):
             args = self.build_arguments(param_order, model, z3_vars)
-            formatted = "(" + ",".join(self._fmt(v) for v in args) + ")"
+            try:
+                values = Input(tuple(self._to_value(v, spec) for v, spec in zip(args, self.param_types)))
+            except (ValueError, TypeError, AssertionError) as e:
+                # same outcome as an input the interpreter could not parse
+                result = InterpretationResult(f"{e}", 0)
+                continue
 
             result = interpret(
-                method=self.method_id,
-                inputs=formatted,
+                method=self.abs_method_id,
+                inputs=values,
                 verbose=False,
                 assertions_disabled=True
             )
@@ -151,5 +115,5 @@ class GenerationInvoker:
                 break
 
         # print("METHOD:", self.method_id)
-        # print("FORMATTED:", formatted)
+        # print("ARGS:", args)
         return result
@@ -1,27 +1,71 @@
 """Assertion Solver using Z3 library."""
-from dataclasses import dataclass
-from typing import Any
+import random
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Any, Iterator, Literal
 from tree_sitter import Node
 import z3
-from .utils import translate_expression
+from .utils import translate_expression, compile_expression, build_expression, expression_variables
+
+Sampling = Literal["sequential", "diverse"]
+
+# Java int range and the values most likely to hit edge cases in the method body
+INT_MIN, INT_MAX = -2**31, 2**31 - 1
+BOUNDARY_VALUES = (0, 1, -1, INT_MAX, INT_MIN)
 
 
 @dataclass
 class SolveResult:
-    """Container for solver output."""
+    """
+    Container for solver output.
+    `contradiction` and `core` are only filled in by the method-level mode (`solve_each`):
+    the assertion itself is unsatisfiable / the assumption literals explaining an unsat check.
+    """
     status: z3.CheckSatResult
     variables: dict[str, Any]
     solver: z3.Solver
     model: z3.ModelRef | None
+    contradiction: bool = False
+    core: list[str] = field(default_factory=list)
+    # further distinct models of the same assertion, enumerated lazily in the same
+    # session (only set by `solve_each`, for contingent assertions)
+    models: Iterator["SolveResult"] | None = None
+
+
+@dataclass(frozen=True)
+class _Scope:
+    """
+    Where models are enumerated: the assumptions passed to every check, the literal
+    guarding blocking clauses and bounds (None: added unconditionally) and the
+    variables that tell two models apart (None: all of them).
+    """
+    assumptions: tuple = ()
+    guard: z3.BoolRef | None = None
+    names: frozenset[str] | None = None
 
 
 class AssertSolver:
-    """Translates Java assert statements into Z3 constraints and finds models."""
+    """
+    Translates Java assert statements into Z3 constraints and finds models.
 
-    def __init__(self, assert_nodes: list[Node]):
+    `var_types` maps variable names of the enclosing method to their Java types,
+    so that char, boolean and array-length variables get the proper sort / domain.
+
+    Sampling modes:
+    - 'sequential': plain enumeration, successive models are usually neighbours.
+    - 'diverse': boundary values first, then extremes found with `z3.Optimize`,
+      then random-seeded solver phases; spreads models over the solution space.
+    """
+
+    def __init__(self, assert_nodes: list[Node], var_types: dict[str, str] | None = None,
+                 sampling: Sampling = "sequential", seed: int = 0):
         self.assert_nodes = assert_nodes
+        self.var_types = var_types or {}
         self.variables: dict[str, Any] = {}
         self.solver = z3.Solver()
+        self.sampling = sampling
+        self.seed = seed
+        self._asserted = False
 
     def _extract_expression_node(self, assert_node: Node) -> Node | None:
         """Return the expression part of an `assert` statement."""
@@ -31,73 +75,259 @@ class AssertSolver:
         return None
 
     def _add_negated_assertions(self):
-        """Translate all assert nodes and add negated expressions to solver."""
+        """Translate all assert nodes and add negated expressions to solver (only once per solver)."""
+        if self._asserted:
+            return
+        self._asserted = True
+
         for assert_node in self.assert_nodes:
             expr_node = self._extract_expression_node(assert_node)
             if not expr_node:
                 continue
 
-            expr = translate_expression(expr_node, self.variables)
-            self.solver.add(z3.Not(expr))
+            domains = []
+            expr = translate_expression(expr_node, self.variables, self.var_types, domains)
+            self.solver.add(z3.Not(expr), *domains)
+
+    def solve_each(self) -> list[SolveResult]:
+        """
+        Method-level mode: check every assertion in `assert_nodes` separately, in one solver session.
+
+        The solver holds the shared variable declarations once. Each assertion is guarded by
+        two assumption literals (`not:i` implies its negation, `holds:i` implies the expression)
+        and each variable domain by a `domain:name` literal, so every assertion is decided by
+        `check(assumptions)` without rebuilding the solver:
+        - `not:i` unsat  -> tautology (the core names the domains it relies on)
+        - `holds:i` unsat -> contradiction
+        - otherwise       -> contingent, with the model of the negation
+        A contingent result carries the iterator of the further models of its assertion
+        (`SolveResult.models`), which keeps checking `not:i` on the same solver; its
+        blocking clauses are guarded by `not:i`, so they do not affect other assertions.
+        Results are returned in the order of `assert_nodes`.
+        """
+        domain_literals = []
+        checks = []
+
+        for index, assert_node in enumerate(self.assert_nodes):
+            expr_node = self._extract_expression_node(assert_node)
+            if not expr_node:
+                checks.append(None)
+                continue
+
+            known = set(self.variables)
+            domains = []
+            compiled = compile_expression(expr_node, self.var_types)
+            expr = build_expression(compiled, self.variables, domains)
+            if domains:
+                names = [name for name in self.variables if name not in known]
+                literal = z3.Bool(f"domain:{','.join(names)}")
+                self.solver.add(z3.Implies(literal, z3.And(domains)))
+                domain_literals.append(literal)
 
-    def _block_current_model(self, model: z3.ModelRef, iteration: int):
+            negated, holds = z3.Bool(f"not:{index}"), z3.Bool(f"holds:{index}")
+            self.solver.add(z3.Implies(negated, z3.Not(expr)), z3.Implies(holds, expr))
+            checks.append((negated, holds, expression_variables(compiled)))
+
+        results = []
+        for check in checks:
+            if check is None:
+                results.append(SolveResult(status=z3.unknown, variables=self.variables, solver=self.solver, model=None))
+                continue
+
+            negated, holds, names = check
+            status = self.solver.check(negated, *domain_literals)
+            outcome = SolveResult(status=status, variables=self.variables, solver=self.solver, model=None)
+            if status == z3.sat:
+                outcome.model = self.solver.model()
+                outcome.contradiction = self.solver.check(holds, *domain_literals) == z3.unsat
+                if outcome.contradiction:
+                    outcome.core = [str(lit) for lit in self.solver.unsat_core()]
+                else:
+                    scope = _Scope((negated, *domain_literals), negated, frozenset(names))
+                    outcome.models = self._iter_models(scope, after=outcome.model)
+            elif status == z3.unsat:
+                outcome.core = [str(lit) for lit in self.solver.unsat_core()]
+            results.append(outcome)
+
+        return results
+
+    def _variables(self, scope: _Scope) -> list[Any]:
+        return [var for name, var in self.variables.items() if scope.names is None or name in scope.names]
+
+    def _add(self, scope: _Scope, *constraints):
+        """Add constraints for the rest of the session, only under the guard of `scope`."""
+        if scope.guard is None:
+            self.solver.add(*constraints)
+        else:
+            self.solver.add(z3.Implies(scope.guard, z3.And(*constraints)))
+
+    def _check(self, scope: _Scope) -> z3.CheckSatResult:
+        return self.solver.check(*scope.assumptions)
+
+    def _block_current_model(self, model: z3.ModelRef, iteration: int, scope: _Scope = _Scope()):
         """Add a clause to block the current model and force the solver to find a new one."""
         literals = []
 
-        for var in self.variables.values():
+        for var in self._variables(scope):
 
             if var.sort().kind() == z3.Z3_INT_SORT and iteration % 2 == 0:
-                self.solver.add(var >= 1)
+                self._add(scope, var >= 1)
 
             val = model.evaluate(var, model_completion=True)
             literals.append(var != val)
 
         if literals:
-            self.solver.add(z3.Or(literals))
+            self._add(scope, z3.Or(literals))
 
         return bool(literals)
 
-    def solve(self, attempts: int = 1) -> SolveResult:
-        """
-        Translate asserts into Z3 expressions, enumerate models, and return the N-th model.
+    def _block_model(self, model: z3.ModelRef, scope: _Scope = _Scope()):
+        """Block exactly the given assignment (no extra bounds, used by the diverse sampler)."""
+        literals = [var != model.evaluate(var, model_completion=True) for var in self._variables(scope)]
+        if literals:
+            self._add(scope, z3.Or(literals))
 
-        Example:
-        attempts=1 -> return the first model
-        attempts=3 -> return the third distinct model
+    def _model_key(self, model: z3.ModelRef, scope: _Scope = _Scope()) -> tuple[str, ...]:
+        """Hashable representation of the assignment of the variables in `scope`."""
+        return tuple(str(model.evaluate(var, model_completion=True)) for var in self._variables(scope))
+
+    def _int_variables(self, scope: _Scope = _Scope()) -> list[z3.ArithRef]:
+        return [var for var in self._variables(scope) if var.sort().kind() == z3.Z3_INT_SORT]
+
+    def _boundary_models(self, scope: _Scope) -> Iterator[z3.ModelRef]:
+        """Models where one integer variable sits on a boundary value."""
+        for var in self._int_variables(scope):
+            for value in BOUNDARY_VALUES:
+                self.solver.push()
+                self.solver.add(var == value)
+                model = self.solver.model() if self._check(scope) == z3.sat else None
+                self.solver.pop()
+                if model is not None:
+                    yield model
+
+    def _extreme_models(self, scope: _Scope) -> Iterator[z3.ModelRef]:
+        """Models minimizing / maximizing each integer variable within the Java int range."""
+        int_vars = self._int_variables(scope)
+        if not int_vars:
+            return
+
+        opt = z3.Optimize()
+        opt.add(self.solver.assertions())
+        opt.add(*scope.assumptions)
+
+        for var in int_vars:
+            for goal in (opt.minimize, opt.maximize):
+                opt.push()
+                goal(var)
+                model = opt.model() if opt.check() == z3.sat else None
+                opt.pop()
+                if model is not None:
+                    yield model
+
+    def _random_models(self, scope: _Scope) -> Iterator[z3.ModelRef]:
         """
-        self._add_negated_assertions()
+        Models from randomized solver phases. Each check additionally cuts the space
+        with a random half-plane per integer variable, dropped again if it is unsatisfiable.
+        """
+        rng = random.Random(self.seed)
+        self.solver.set("random_seed", self.seed)
+        self.solver.set("smt.phase_selection", 5)
+        self.solver.set("smt.arith.random_initial_value", True)
 
-        last_model = None
-        outcome = None
+        while True:
+            self.solver.push()
+            for var in self._int_variables(scope):
+                pivot = rng.randint(-1000, 1000)
+                self.solver.add(var >= pivot if rng.random() < 0.5 else var <= pivot)
+            model = self.solver.model() if self._check(scope) == z3.sat else None
+            self.solver.pop()
 
-        for i in range(attempts):
-            result = self.solver.check()
-            if i == 0 or result == z3.sat:
-                outcome = SolveResult(
-                    status=result,
-                    variables=self.variables,
-                    solver=self.solver,
-                    model=None
-                )
+            if model is None:
+                if self._check(scope) != z3.sat:
+                    return
+                model = self.solver.model()
+            yield model
 
-            if result != z3.sat:
-                return outcome
+    def _iter_diverse_models(self, scope: _Scope, after: z3.ModelRef | None) -> Iterator[SolveResult]:
+        """Enumerate distinct models spread across the solution space (see class docstring)."""
+        variables = self._variables(scope)
+        for var in self._int_variables(scope):
+            self._add(scope, var >= INT_MIN, var <= INT_MAX)
 
-            model = self.solver.model()
-            outcome.model = model
+        seen = set()
+        if after is not None:
+            if not variables:
+                return
+            seen.add(self._model_key(after, scope))
+            self._block_model(after, scope)
+
+        status = self._check(scope)
+        if status != z3.sat:
+            if after is None:
+                yield SolveResult(status=status, variables=self.variables, solver=self.solver, model=None)
+            return
+
+        for model in chain(self._boundary_models(scope), self._extreme_models(scope), self._random_models(scope)):
+            key = self._model_key(model, scope)
+            # block every drawn model so the random phase always makes progress
+            self._block_model(model, scope)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield SolveResult(status=z3.sat, variables=self.variables, solver=self.solver, model=model)
+
+            if not variables:
+                return
+
+    def _iter_models(self, scope: _Scope, after: z3.ModelRef | None = None) -> Iterator[SolveResult]:
+        """Enumerate the models of `scope`, starting after the model `after` if given."""
+        if self.sampling == "diverse":
+            yield from self._iter_diverse_models(scope, after)
+            return
 
-            # If this is the model we want, return it
-            if i == attempts - 1:
-                return outcome
+        iteration = 0
+        if after is not None:
+            if not self._block_current_model(after, iteration, scope):
+                return
+            iteration += 1
 
-            # Otherwise block the current model and continue
-            has_vars = self._block_current_model(model, i)
+        while True:
+            status = self._check(scope)
+            if status != z3.sat:
+                if iteration == 0:
+                    yield SolveResult(status=status, variables=self.variables, solver=self.solver, model=None)
+                return
+
+            model = self.solver.model()
+            yield SolveResult(status=status, variables=self.variables, solver=self.solver, model=model)
 
             # No new distinct model exists
-            if not has_vars:
-                return outcome
+            if not self._block_current_model(model, iteration, scope):
+                return
+            iteration += 1
+
+    def iter_models(self) -> Iterator[SolveResult]:
+        """
+        Lazily enumerate distinct models on one persistent solver.
 
-            last_model = model
-            outcome.model = last_model
+        The first result always carries the status of the negated assertions
+        (an `unsat` result is yielded once and ends the enumeration). Every
+        following result is a new model; blocking clauses accumulate in the
+        same solver, so pulling the N-th model costs one check instead of N.
+        """
+        self._add_negated_assertions()
+        yield from self._iter_models(_Scope())
 
+    def solve(self, attempts: int = 1) -> SolveResult:
+        """
+        Translate asserts into Z3 expressions, enumerate models, and return the N-th model.
+        If fewer than N models exist, the last one found is returned.
+
+        Example:
+        attempts=1 -> return the first model
+        attempts=3 -> return the third distinct model
+        """
+        outcome = None
+        for outcome in islice(self.iter_models(), attempts):
+            pass
         return outcome
@@ -1,6 +1,19 @@
 """Utils for the Assertion Solver package based on Z3 library."""
+import codecs
 from tree_sitter import Node
-from z3 import Int, RealVal, And, Or, Not
+from z3 import Int, Bool, RealVal, BoolVal, And, Or, Not, ExprRef
+
+# AST-independent form of a translated expression. Plain tuples, so they can be
+# cached across solvers and pickled to worker processes:
+#   ("lit", int) | ("real", str) | ("bool", bool)
+#   ("var", name, sort)          sort: "int" | "char" | "boolean" | "length"
+#   ("not", expr) | ("neg", expr) | ("bin", op, left, right)
+Expr = tuple
+
+BINARY_OPERATORS = {"+", "-", "*", "/", "%", ">", ">=", "<", "<=", "==", "!=", "&&", "||"}
+
+# (assertion source text, sorted enclosing-method variable types) -> Expr
+_TRANSLATIONS: dict[tuple[str, tuple[tuple[str, str], ...]], Expr] = {}
 
 
 # def node_text(node, code_bytes):
@@ -12,55 +25,149 @@ def node_text(node: Node):
     # assert str(node.text)[2:-1] == node.text.decode(), f"{str(node.text)[2:-1]} != {node.text.decode()}"
     return node.text.decode()
 
-def translate_expression(node: Node, variables):
-    """Recursively translate a Tree-sitter expression node into a Z3 expression."""
+
+def variable_sort(name: str, var_types: dict[str, str]) -> str:
+    """Pick the Z3 sort of a variable from its Java type (everything unknown is an int)."""
+    if name.endswith(".length"):
+        return "length"
+    match var_types.get(name):
+        case "boolean" | "Boolean":
+            return "boolean"
+        case "char" | "Character":
+            return "char"
+    return "int"
+
+
+def _compile(node: Node, var_types: dict[str, str]) -> Expr:
+    """Recursively translate a Tree-sitter expression node into an `Expr`."""
     t = node.type
-    var_name = node_text(node).strip()
+
+    if t in ("true", "false"):
+        return ("bool", t == "true")
+
+    if t == "character_literal":
+        char = codecs.decode(node_text(node)[1:-1], "unicode_escape")
+        return ("lit", ord(char))
 
     if t.endswith("_literal"):
+        literal = node_text(node).strip()
         try:
-            return int(var_name)
+            return ("lit", int(literal))
         except ValueError:
-            return RealVal(var_name)
+            return ("real", literal)
 
-    if t in ("identifier", "method_invocation"):
-        if var_name not in variables:
-            variables[var_name] = Int(var_name)
-        return variables[var_name]
+    if t in ("identifier", "method_invocation", "field_access"):
+        name = node_text(node).strip()
+        return ("var", name, variable_sort(name, var_types))
 
     if t == "parenthesized_expression":
-        return translate_expression(node.children[1], variables)
+        return _compile(node.children[1], var_types)
 
     if t == "unary_expression":
-        op = node.children[0]
-        operand = node.children[1]
-        if node_text(op) == "!":
-            return Not(translate_expression(operand, variables))
-        raise ValueError(
-            f"Unhandled unary operator: {node_text(op)}")
+        op = node_text(node.children[0])
+        operand = _compile(node.children[1], var_types)
+        match op:
+            case "!":
+                return ("not", operand)
+            case "-":
+                return ("neg", operand)
+            case "+":
+                return operand
+        raise ValueError(f"Unhandled unary operator: {op}")
 
     if t == "binary_expression":
         left, op, right = node.children
-        l = translate_expression(left, variables)
-        r = translate_expression(right, variables)
         op_text = node_text(op)
+        if op_text not in BINARY_OPERATORS:
+            raise ValueError(f"Unhandled binary operator: {op_text}")
+        return ("bin", op_text, _compile(left, var_types), _compile(right, var_types))
+
+    raise ValueError(f"Unhandled node type: {t} with text: {node_text(node).strip()}")
+
+
+def compile_expression(node: Node, var_types: dict[str, str] | None = None) -> Expr:
+    """
+    Translate an expression node into an `Expr`, memoized by the source text of the
+    expression and the variable types of the enclosing method.
+    """
+    var_types = var_types or {}
+    key = (node_text(node).strip(), tuple(sorted(var_types.items())))
+    expr = _TRANSLATIONS.get(key)
+    if expr is None:
+        expr = _compile(node, var_types)
+        _TRANSLATIONS[key] = expr
+    return expr
+
+
+def declare_variable(name: str, sort: str) -> tuple[ExprRef, list[ExprRef]]:
+    """Create the Z3 constant for a variable together with its domain constraints."""
+    match sort:
+        case "boolean":
+            return Bool(name), []
+        case "char":
+            var = Int(name)
+            return var, [var >= 0, var <= 0xFFFF]
+        case "length":
+            var = Int(name)
+            return var, [var >= 0]
+    return Int(name), []
+
+
+def build_expression(expr: Expr, variables, domains: list | None = None):
+    """
+    Build the Z3 expression of an `Expr`. New variables are added to `variables`,
+    their domain constraints (char range, non-negative lengths) to `domains`.
+    """
+    match expr:
+        case ("lit", value):
+            return value
+        case ("real", literal):
+            return RealVal(literal)
+        case ("bool", value):
+            return BoolVal(value)
+        case ("var", name, sort):
+            if name not in variables:
+                variables[name], constraints = declare_variable(name, sort)
+                if domains is not None:
+                    domains.extend(constraints)
+            return variables[name]
+        case ("not", operand):
+            return Not(build_expression(operand, variables, domains))
+        case ("neg", operand):
+            return -build_expression(operand, variables, domains)
+        case ("bin", op, left, right):
+            l = build_expression(left, variables, domains)
+            r = build_expression(right, variables, domains)
+            match op:
+                case "+": return l + r
+                case "-": return l - r
+                case "*": return l * r
+                case "/": return l / r
+                case ">": return l > r
+                case ">=": return l >= r
+                case "<": return l < r
+                case "<=": return l <= r
+                case "==": return l == r
+                case "!=": return l != r
+                case "%": return l % r
+                case "&&": return And(l, r)
+                case "||": return Or(l, r)
+
+    raise ValueError(f"Unhandled expression: {expr!r}")
+
+
+def translate_expression(node: Node, variables, var_types: dict[str, str] | None = None, domains: list | None = None):
+    """Translate a Tree-sitter expression node into a Z3 expression (through the translation cache)."""
+    return build_expression(compile_expression(node, var_types), variables, domains)
+
 
-        match op_text:
-            case "+": expr = l + r
-            case "-": expr = l - r
-            case "*": expr = l * r
-            case "/": expr = l / r
-            case ">": expr = l > r
-            case ">=": expr = l >= r
-            case "<": expr = l < r
-            case "<=": expr = l <= r
-            case "==": expr = l == r
-            case "!=": expr = l != r
-            case "%": expr = l % r
-            case "&&": expr = And(l, r)
-            case "||": expr = Or(l, r)
-            case _:
-                raise ValueError(f"Unhandled binary operator: {op_text}")
-        return expr
-
-    raise ValueError(f"Unhandled node type: {t} with text: {var_name}")
+def expression_variables(expr: Expr) -> list[str]:
+    """The names of the variables occurring in an `Expr`, in order of first occurrence."""
+    match expr:
+        case ("var", name, _):
+            return [name]
+        case ("not", operand) | ("neg", operand):
+            return expression_variables(operand)
+        case ("bin", _, left, right):
+            return list(dict.fromkeys(expression_variables(left) + expression_variables(right)))
+    return []
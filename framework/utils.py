@@ -1,3 +1,4 @@
+import hashlib
 import sys
 from pathlib import Path
 from loguru import logger
@@ -23,4 +24,13 @@ def configure_logger():
     """Configures the logger with a custom format."""
     logger.remove()
     logger.add(sys.stderr, format="[{level}] {message}")
-    return logger
\ No newline at end of file
+    return logger
+
+
+def derive_seed(run_seed: int, *names: str) -> int:
+    """
+    Derive an independent, reproducible seed for `names` (e.g. a method id) from the
+    seed of the whole run. Unlike `hash`, the result is the same in every process.
+    """
+    key = ":".join([str(run_seed), *names]).encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big")
@@ -1,11 +1,19 @@
 from jpamb import jvm
 from jpamb.model import Suite, Input
 
-from typing import NoReturn, Any
+from typing import NoReturn, Any, Callable
 
 from pathlib import Path
 
 
+# the last line of every response of an analyzer started as `PROGRAM serve`
+SERVE_DONE = "%% done"
+SERVE_FAILED = "%% failed"
+
+# set by runners that call the analysis themselves, gets the function passed to `serve`
+serve_hook: Callable[[Callable[[], Any]], None] | None = None
+
+
 def getmethodid(
     name: str,
     version: str,
@@ -71,3 +79,38 @@ def parse_methodid(mid) -> jvm.AbsMethodID:
 
 def parse_input(i) -> Input:
     return Input.decode(i)
+
+
+def serve(main: Callable[[], Any]) -> None:
+    """Run the analysis `main`, which reads its arguments from `sys.argv`.
+
+    Started as `PROGRAM serve`, the program stays alive instead: every line on
+    stdin holds the (shell quoted) arguments of one run, `main` is called with
+    `sys.argv` set to them, and its output, on stdout and on stderr, is followed
+    by a `SERVE_DONE` line (`SERVE_FAILED` if it raised or exited with an error). `sys.exit(0)`, as in
+    `printinfo`, ends the request, not the server.
+    """
+    import shlex
+    import sys
+    import traceback
+
+    if serve_hook is not None:
+        serve_hook(main)
+
+    if sys.argv[1:] != ["serve"]:
+        main()
+        return
+
+    program = sys.argv[0]
+    for line in sys.stdin:
+        sys.argv = [program, *shlex.split(line)]
+        try:
+            main()
+            status = SERVE_DONE
+        except SystemExit as e:
+            status = SERVE_DONE if e.code in (None, 0) else SERVE_FAILED
+        except Exception:
+            traceback.print_exc()
+            status = SERVE_FAILED
+        print(status, file=sys.stderr, flush=True)
+        print(status, flush=True)
@@ -0,0 +1,93 @@
+"""jpamb.benchmark
+
+This module summarizes repeated measurements (the times of the iterations of
+`jpamb evaluate`): outliers are rejected, and the rest is summarized by the
+mean with its confidence interval, the median and the 95th percentile.
+
+In adaptive mode `evaluate` keeps measuring a method until the confidence
+interval of its mean time is narrow enough (see `Summary.converged`).
+"""
+
+import math
+import statistics
+from dataclasses import dataclass
+
+# the 97.5% quantiles of Student's t distribution, by degrees of freedom
+T_975 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]  # fmt: skip
+
+# modified z-score (Iglewicz and Hoaglin) above which a sample is an outlier
+OUTLIER_Z = 3.5
+# fewer samples than this are never rejected
+OUTLIER_MIN_SAMPLES = 5
+
+
+def t_quantile(df: int) -> float:
+    """The 97.5% quantile of Student's t distribution, for a 95% interval."""
+    if df <= len(T_975):
+        return T_975[df - 1]
+    return statistics.NormalDist().inv_cdf(0.975)
+
+
+def outliers(xs: list[float]) -> list[bool]:
+    """Which of `xs` are outliers, by their distance to the median in MADs."""
+    if len(xs) < OUTLIER_MIN_SAMPLES:
+        return [False] * len(xs)
+    median = statistics.median(xs)
+    mad = statistics.median(abs(x - median) for x in xs)
+    if mad == 0:
+        return [False] * len(xs)
+    return [0.6745 * abs(x - median) / mad > OUTLIER_Z for x in xs]
+
+
+def percentile(xs: list[float], p: float) -> float:
+    """The `p`th percentile of `xs`, interpolating between the closest ranks."""
+    xs = sorted(xs)
+    k = (len(xs) - 1) * p / 100
+    lo = math.floor(k)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+
+@dataclass(frozen=True)
+class Summary:
+    mean: float
+    median: float
+    p95: float
+    # the 95% confidence interval of the mean, None for a single sample
+    ci: tuple[float, float] | None
+    samples: int
+
+    @classmethod
+    def of(cls, xs: list[float]) -> "Summary":
+        mean = statistics.fmean(xs)
+        ci = None
+        if len(xs) > 1:
+            half = t_quantile(len(xs) - 1) * statistics.stdev(xs) / math.sqrt(len(xs))
+            ci = (mean - half, mean + half)
+        return cls(
+            mean=mean,
+            median=statistics.median(xs),
+            p95=percentile(xs, 95),
+            ci=ci,
+            samples=len(xs),
+        )
+
+    def converged(self, target: float) -> bool:
+        """Whether the interval is within `target` (a fraction) of the mean."""
+        if self.ci is None:
+            return False
+        lo, hi = self.ci
+        return (hi - lo) / 2 <= target * abs(self.mean)
+
+    def asdict(self) -> dict:
+        return {
+            "mean": self.mean,
+            "median": self.median,
+            "p95": self.p95,
+            "ci": list(self.ci) if self.ci else None,
+            "samples": self.samples,
+        }
@@ -0,0 +1,123 @@
+"""jpamb.calibration
+
+This module estimates the speed of the machine, by timing a reference
+workload (`timer.sieve`). The `relative` times of `jpamb evaluate` are the
+times of the analyses divided by this estimate, so they stay comparable
+between machines.
+
+The workload is not timed around every run. A `Calibration` samples it on a
+schedule: a few samples up front, then whenever `interval` seconds have passed,
+and again right away while the samples drift away from the estimate. The
+estimate is the mean (and variance) of the last `window` samples.
+
+No sample is taken while a job runs, as it would be timed under the load of
+the job. A sample that is due waits for the running jobs to finish, and holds
+back new ones until it is taken.
+"""
+
+import math
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import monotonic, perf_counter_ns
+
+
+def sample(count: int = 100_000) -> int:
+    """The time of one run of the reference workload, in nanoseconds."""
+    from jpamb import timer
+
+    start = perf_counter_ns()
+    timer.sieve(count)
+    end = perf_counter_ns()
+    return end - start
+
+
+class Calibration:
+    """A rolling estimate of the time of the reference workload, shared by all jobs."""
+
+    def __init__(
+        self,
+        interval: float = 10.0,
+        window: int = 10,
+        warmup: int = 3,
+        drift: float = 3.0,
+        count: int = 100_000,
+    ):
+        self.interval = interval
+        self.warmup = warmup
+        # a sample further than `drift` standard deviations (but at least 10%)
+        # from the mean counts as drift
+        self.drift = drift
+        self.count = count
+        self.window = deque(maxlen=window)
+        # all samples as (seconds since the start, nanoseconds, drifted)
+        self.samples = []
+        self.start = monotonic()
+        self.due = self.start
+        self.lock = threading.Condition()
+        # the number of jobs running right now
+        self.active = 0
+
+    @property
+    def mean(self) -> float:
+        return sum(self.window) / len(self.window)
+
+    @property
+    def variance(self) -> float:
+        n = len(self.window)
+        if n < 2:
+            return 0.0
+        mean = self.mean
+        return sum((x - mean) ** 2 for x in self.window) / (n - 1)
+
+    def drifted(self, ns: int) -> bool:
+        if len(self.window) < self.warmup:
+            return False
+        mean = self.mean
+        return abs(ns - mean) > max(self.drift * math.sqrt(self.variance), 0.1 * mean)
+
+    def measure(self) -> int:
+        """Sample the workload now, and schedule the next sample."""
+        ns = sample(self.count)
+        now = monotonic()
+        drifted = self.drifted(ns)
+        self.window.append(ns)
+        self.samples.append((now - self.start, ns, drifted))
+        # while drifting, sample again at the next opportunity
+        self.due = now if drifted else now + self.interval
+        return ns
+
+    @contextmanager
+    def job(self):
+        """Run a job against the current estimate, sampling first if a sample is due."""
+        with self.lock:
+            measured = False
+            while len(self.window) < self.warmup or (
+                not measured and monotonic() >= self.due
+            ):
+                if self.active:
+                    self.lock.wait()
+                    continue
+                self.measure()
+                measured = True
+            self.active += 1
+            estimate = self.mean
+        try:
+            yield estimate
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.lock.notify_all()
+
+    def report(self) -> dict:
+        with self.lock:
+            return {
+                "count": self.count,
+                "mean": self.mean if self.window else None,
+                "stdev": math.sqrt(self.variance),
+                "window": list(self.window),
+                "samples": [
+                    {"at": at, "time": ns, "drifted": drifted}
+                    for at, ns, drifted in self.samples
+                ],
+            }
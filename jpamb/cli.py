@@ -3,6 +3,7 @@ from pathlib import Path
 import shlex
 import enum
 import math
+import statistics
 import sys
 import json
 from inspect import getsourcelines, getsourcefile
@@ -10,13 +11,22 @@ from collections import Counter
 import matplotlib.pyplot as plt
 import matplotlib.colors as colors
 
-from jpamb import model, logger, jvm
+import jpamb
+from jpamb import model, logger, jvm, runner
 from jpamb.logger import log
+from jpamb.calibration import Calibration
+from jpamb.benchmark import Summary, outliers
 
+import io
+import os
+import queue
 import subprocess
+import threading
 import dataclasses
-from contextlib import contextmanager
-from typing import IO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import IO, Callable, Iterable
 
 import re
 
@@ -40,96 +50,321 @@ def re_parser(ctx_, parms_, expr):
 
 
 def run(cmd: list[str], /, timeout=2.0, logout=None, logerr=None, **kwargs):
-    import threading
-    from time import monotonic, perf_counter_ns
+    """Run `cmd` (see `jpamb.runner.run`), returns its stdout and wall-clock time in ns."""
+    cp = runner.run(cmd, timeout=timeout, logout=logout, logerr=logerr, **kwargs)
+    return (cp.stdout, cp.time)
+
+
+class AnalyzerServer:
+    """A long-lived analyzer, started once as `PROGRAM serve` (see `jpamb.serve`).
+
+    Every request is one line with the (shell quoted) arguments of a run; the
+    response is the output up to the `SERVE_DONE` line, on stdout and on stderr.
+    A freshly started server first answers an `info` request, so its startup
+    is not measured; afterwards only the time from sending a request to the end
+    of its response is. A server that dies or times out is restarted by the
+    next request.
+    """
+
+    def __init__(self, program, startup_timeout=30.0):
+        self.program = tuple(program)
+        self.cmd = self.program + ("serve",)
+        self.startup_timeout = startup_timeout
+        self.cp = None
+
+    def _start(self):
+        self.cp = cp = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        self.stdout = queue.SimpleQueue()
+        self.stderr = queue.SimpleQueue()
 
-    if not logerr:
+        def pump(stream, lines):
+            with stream:
+                for line in iter(stream.readline, ""):
+                    lines.put(line)
+            lines.put(None)
 
-        def logerr(a):
-            pass
+        for stream, lines in ((cp.stdout, self.stdout), (cp.stderr, self.stderr)):
+            threading.Thread(target=pump, args=(stream, lines), daemon=True).start()
+
+        self._exchange(("info",), self.startup_timeout)
 
-    if not logout:
+    def _response(self, lines, cmd, timeout, end, consume):
+        """Pass the lines of the current response to `consume`, return its status line
+        (or the exit code, if the server died)."""
+        from time import monotonic
 
-        def logout(a):
+        while True:
+            try:
+                line = lines.get(timeout=end and max(end - monotonic(), 0))
+            except queue.Empty:
+                self.close()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            if line is None:
+                exitcode = self.cp.wait()
+                self.cp = None
+                return exitcode
+            if (status := line.rstrip("\n")) in (jpamb.SERVE_DONE, jpamb.SERVE_FAILED):
+                return status
+            consume(line)
+
+    def _exchange(self, args, timeout, logerr=None):
+        from time import monotonic, perf_counter_ns
+
+        if not logerr:
+
+            def logerr(a):
+                pass
+
+        cmd = list(self.cmd) + list(args)
+        stdout = []
+        end = monotonic() + timeout if timeout else None
+        start_ns = perf_counter_ns()
+        try:
+            self.cp.stdin.write(shlex.join(map(str, args)) + "\n")
+            self.cp.stdin.flush()
+        except BrokenPipeError:
             pass
+        status = self._response(self.stdout, cmd, timeout, end, stdout.append)
+        end_ns = perf_counter_ns()
+        if self.cp is not None:
+            # the stderr of the request ends with the status line as well
+            self._response(self.stderr, cmd, timeout, end, lambda line: logerr(line[:-1]))
+
+        if status != jpamb.SERVE_DONE:
+            raise subprocess.CalledProcessError(
+                returncode=1 if status == jpamb.SERVE_FAILED else status,
+                cmd=cmd,
+                output="".join(stdout),
+            )
+        return ("".join(stdout), end_ns - start_ns)
+
+    def request(self, args, /, timeout=2.0, logerr=None):
+        if self.cp is None or self.cp.poll() is not None:
+            self._start()
+        return self._exchange(args, timeout, logerr)
+
+    def close(self):
+        if self.cp is None:
+            return
+        try:
+            self.cp.stdin.close()
+            self.cp.wait(0.5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.cp.kill()
+            self.cp.wait()
+        self.cp = None
+
+
+class _Expired(BaseException):
+    """Raised into an in-process analysis when its time is up (not an Exception,
+    so the analysis cannot swallow it)."""
 
-    cp = None
-    stdout = []
-    stderr = []
-    tout = None
+
+@contextmanager
+def _deadline(timeout):
+    """Interrupt the block after `timeout` seconds (main thread and SIGALRM only)."""
+    import signal
+
+    if (
+        not timeout
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def expire(signum, frame):
+        raise _Expired()
+
+    old = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
     try:
-        start = monotonic()
-        start_ns = perf_counter_ns()
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, old)
 
-        if timeout:
-            end = start + timeout
-        else:
-            end = None
 
-        cp = subprocess.Popen(
-            cmd,
-            stderr=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            text=True,
-            **kwargs,
-        )
-        assert cp and cp.stdout and cp.stderr
-
-        def log_lines(cp):
-            assert cp.stderr
-            with cp.stderr:
-                for line in iter(cp.stderr.readline, ""):
-                    stderr.append(line)
-                    logerr(line[:-1])
-
-        def save_result(cp):
-            assert cp.stdout
-            with cp.stdout:
-                for line in iter(cp.stdout.readline, ""):
-                    stdout.append(line)
-                    logout(line[:-1])
-
-        terr = threading.Thread(
-            target=log_lines,
-            args=(cp,),
-            daemon=True,
-        )
-        terr.start()
-        tout = threading.Thread(
-            target=save_result,
-            args=(cp,),
-            daemon=True,
-        )
-        tout.start()
+class _LineWriter(io.TextIOBase):
+    """A text stream passing every complete line to `target`."""
 
-        terr.join(end and end - monotonic())
-        tout.join(end and end - monotonic())
-        exitcode = cp.wait(end and end - monotonic())
-        end_ns = perf_counter_ns()
+    def __init__(self):
+        self.target = None
+        self.partial = ""
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        *lines, self.partial = (self.partial + text).split("\n")
+        for line in lines:
+            if self.target:
+                self.target(line)
+        return len(text)
+
+    def flush(self):
+        if self.partial:
+            self.write("\n")
+
+
+class InProcessAnalyzer:
+    """A python analyzer run inside the jpamb process (`--in-process`).
+
+    The script is compiled once; every request executes it as `__main__` with
+    `sys.argv` set to the arguments of the run and its stdout captured, so the
+    modules it imports stay loaded between requests. An analysis handed to
+    `jpamb.serve` is executed once, later requests only call it. Timeouts are
+    only enforced on the main thread.
+    """
+
+    def __init__(self, program):
+        self.program = tuple(program)
+        self.script = Path(self.program[-1])
+        self.code = compile(self.script.read_bytes(), str(self.script), "exec")
+        self.main = None
+        # one stream for all requests, loggers set up by the analysis keep writing to it
+        self.stderr = _LineWriter()
+
+    def _execute(self):
+        if self.main is not None:
+            self.main()
+            return
+
+        def register(main):
+            self.main = main
+
+        namespace = {"__name__": "__main__", "__file__": str(self.script)}
+        jpamb.serve_hook = register
+        try:
+            exec(self.code, namespace)
+        finally:
+            jpamb.serve_hook = None
+
+    def request(self, args, /, timeout=2.0, logerr=None):
+        import traceback
+        from contextlib import redirect_stderr, redirect_stdout
+        from time import perf_counter_ns
+
+        cmd = list(self.program) + list(args)
+        self.stderr.target = logerr
+        stdout = io.StringIO()
+        argv, path = sys.argv, list(sys.path)
+        sys.argv = [str(self.script), *map(str, args)]
+        sys.path.insert(0, str(self.script.parent))
+        exitcode = 0
+        start_ns = perf_counter_ns()
+        try:
+            with redirect_stdout(stdout), redirect_stderr(self.stderr), _deadline(timeout):
+                try:
+                    self._execute()
+                except SystemExit as e:
+                    if isinstance(e.code, int) or e.code is None:
+                        # as the exit status of a process
+                        exitcode = (e.code or 0) & 0xFF
+                    else:
+                        print(e.code, file=sys.stderr)
+                        exitcode = 1
+        except _Expired:
+            raise subprocess.TimeoutExpired(cmd, timeout, output=stdout.getvalue())
+        except Exception:
+            self.stderr.write(traceback.format_exc())
+            exitcode = 1
+        finally:
+            end_ns = perf_counter_ns()
+            sys.argv = argv
+            sys.path[:] = path
+            self.stderr.flush()
 
         if exitcode != 0:
             raise subprocess.CalledProcessError(
-                cmd=cmd,
-                returncode=exitcode,
-                stderr="".join(stderr),
-                output="".join(stdout),
+                returncode=exitcode, cmd=cmd, output=stdout.getvalue()
             )
+        return (stdout.getvalue(), end_ns - start_ns)
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def analyzer_runners(program, server=False, in_process=False):
+    """Yield a function giving the calling (worker) thread the runner of the
+    PROGRAM: its own AnalyzerServer with `server`, the shared InProcessAnalyzer
+    with `in_process`, and None (a new process per run) otherwise. All
+    runners are stopped on exit."""
+    local = threading.local()
+    started = []
+    if in_process:
+        started.append(InProcessAnalyzer(program))
+
+    def runner():
+        if in_process:
+            return started[0]
+        if not server:
+            return None
+        if (s := getattr(local, "server", None)) is None:
+            s = local.server = AnalyzerServer(program)
+            started.append(s)
+        return s
 
-        return ("".join(stdout), end_ns - start_ns)
-    except subprocess.CalledProcessError as e:
-        if tout:
-            tout.join()
-        e.stderr = "".join(stderr)
-        e.stdout = "".join(stdout)
-        raise e
-    except subprocess.TimeoutExpired:
-        if cp:
-            cp.terminate()
-            if cp.stdout:
-                cp.stdout.close()
-            if cp.stderr:
-                cp.stderr.close()
-        raise
+    try:
+        yield runner
+    finally:
+        for s in started:
+            s.close()
+
+
+def available_cores() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def run_jobs(tasks: Iterable[Callable], jobs: int = 1, pin: bool = False):
+    """Run `tasks` on a pool of `jobs` worker threads and yield their results in
+    task order, so reports do not depend on scheduling.
+
+    At most `jobs` tasks are in flight at a time; a single unpinned job runs
+    in the calling thread. With `pin` every worker is
+    bound to a core of its own, and so are the processes it starts (they
+    inherit the affinity of the thread that spawns them).
+    """
+    if jobs == 1 and not pin:
+        # in the calling thread, which in-process analyzers need for their timeouts
+        for task in tasks:
+            yield task()
+        return
+
+    initializer = None
+    if pin:
+        if not hasattr(os, "sched_setaffinity"):
+            log.warning("Pinning jobs to cores is not supported on this platform.")
+        else:
+            cores = available_cores()
+            if jobs > len(cores):
+                log.warning(f"Only {len(cores)} cores available, running {len(cores)} jobs.")
+                jobs = len(cores)
+            free = deque(cores[:jobs])
+
+            def initializer():
+                os.sched_setaffinity(0, {free.popleft()})
+
+    pool = ThreadPoolExecutor(max_workers=jobs, initializer=initializer)
+    pending = deque()
+    try:
+        for task in tasks:
+            pending.append(pool.submit(task))
+            if len(pending) >= jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
 
 
 @dataclasses.dataclass
@@ -155,7 +390,25 @@ class Reporter:
         for msg in msgs.splitlines():
             print(f"{self.prefix}{msg}", file=self.report)
 
-    def run(self, args, **kwargs):
+    def buffered(self, buffer: bool = True) -> "Reporter":
+        """A reporter at the same indentation, writing to memory until `flush`ed.
+
+        Without `buffer` this is the reporter itself, which writes right away.
+        """
+        if not buffer:
+            return self
+        return Reporter(io.StringIO(), self.prefix)
+
+    def flush(self, buffered: "Reporter"):
+        if buffered is self:
+            return
+        self.report.write(buffered.report.getvalue())
+        buffered.report.seek(0)
+        buffered.report.truncate()
+
+    def run(self, args, runner=None, **kwargs):
+        if runner is not None:
+            return self.request(runner, args[len(runner.program) :], **kwargs)
         with self.context(f"Run {shlex.join(args)}"):
             with self.context("Stderr"):
                 out, time = run(args, logerr=self.output, **kwargs)
@@ -163,6 +416,50 @@ class Reporter:
                 self.output(out)
             return out
 
+    def request(self, runner, args, **kwargs):
+        with self.context(f"Request {shlex.join(args)}"):
+            with self.context("Stderr"):
+                out, time = runner.request(args, logerr=self.output, **kwargs)
+            with self.context("Stdout"):
+                self.output(out)
+            return out
+
+
+def read_stream(path: Path) -> dict:
+    """The methods in a JSON-lines file written by `evaluate --stream`.
+
+    A missing file has none. A last line cut short by a crash is removed
+    from the file, so the results of the next run are appended after it.
+    Lines that are not results (of this version) are skipped, so their
+    methods are run again.
+    """
+    bymethod = {}
+    try:
+        with open(path, "rb+") as f:
+            start = 0
+            for n, line in enumerate(f, 1):
+                if not line.endswith(b"\n"):
+                    log.warning(f"{path}:{n}: removing incomplete line")
+                    f.truncate(start)
+                    break
+                start += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+                method = entry.get("method") if isinstance(entry, dict) else None
+                if not isinstance(method, str) or not all(
+                    isinstance(entry.get(k), (int, float))
+                    for k in ("score", "time", "relative")
+                ):
+                    log.warning(f"{path}:{n}: skipping invalid line")
+                    continue
+                del entry["method"]
+                bymethod[method] = entry
+    except FileNotFoundError:
+        pass
+    return bymethod
+
 
 def resolve_cmd(program, with_python=None):
     if with_python is None:
@@ -189,6 +486,17 @@ def resolve_cmd(program, with_python=None):
     return program
 
 
+def check_in_process(program, in_process, jobs, pin):
+    """The jobs and pinning to use; an in-process PROGRAM must be a python script and runs one case at a time."""
+    if not in_process:
+        return jobs, pin
+    if not str(program[-1]).lower().endswith(".py"):
+        raise click.UsageError("--in-process needs the PROGRAM to be a python script.")
+    if jobs > 1 or pin:
+        log.warning("--in-process runs one case at a time, ignoring --jobs and --pin.")
+    return 1, False
+
+
 @click.group()
 @click.option(
     "-v",
@@ -252,9 +560,29 @@ def checkhealth(suite):
     type=click.File(mode="w"),
     help="A file to write the report to. (Good for golden testing)",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    show_default=True,
+    default=1,
+    type=click.IntRange(min=1),
+    help="number of cases to run in parallel.",
+)
+@click.option(
+    "--pin/--no-pin",
+    help="pin every job to a core of its own (for timing-sensitive runs).",
+)
+@click.option(
+    "--server/--no-server",
+    help="start the PROGRAM once per job as `PROGRAM serve` and send it the cases line by line (see `jpamb.serve`).",
+)
+@click.option(
+    "--in-process/--no-in-process",
+    help="run the PROGRAM, a python script, inside jpamb instead of starting a process per case.",
+)
 @click.argument("PROGRAM", nargs=-1)
 @click.pass_obj
-def test(suite, program, report, filter, fail_fast, with_python, timeout):
+def test(suite, program, report, filter, fail_fast, with_python, timeout, jobs, pin, server, in_process):
     """Test run a PROGRAM."""
 
     program = resolve_cmd(program, with_python)
@@ -270,19 +598,34 @@ def test(suite, program, report, filter, fail_fast, with_python, timeout):
                 for k, v in sorted(dataclasses.asdict(info).items()):
                     r.output(f"- {k}: {v}")
 
-    total = 0
-    for methodid, correct in suite.case_methods():
-        if filter and not filter.search(str(methodid)):
-            continue
+    def run_case(methodid, correct):
+        cr = r.buffered(jobs > 1)
+        try:
+            with cr.context(f"Case {methodid}"):
+                out = cr.run(program + (str(methodid),), runner=runners(), timeout=timeout)
+                response = model.Response.parse(out)
+                with cr.context("Results"):
+                    for k, v in sorted(response.predictions.items()):
+                        cr.output(f"- {k}: {v} {v.wager:0.2f}")
+                score = response.score(correct)
+                cr.output(f"Score {score:0.2f}")
+        except BaseException:
+            # the report of the failing case is what shows why it failed
+            r.flush(cr)
+            raise
+        return cr, score
+
+    cases = (
+        (lambda m=methodid, c=correct: run_case(m, c))
+        for methodid, correct in suite.case_methods()
+        if not filter or filter.search(str(methodid))
+    )
 
-        with r.context(f"Case {methodid}"):
-            out = r.run(program + (str(methodid),), timeout=timeout)
-            response = model.Response.parse(out)
-            with r.context("Results"):
-                for k, v in sorted(response.predictions.items()):
-                    r.output(f"- {k}: {v} {v.wager:0.2f}")
-            score = response.score(correct)
-            r.output(f"Score {score:0.2f}")
+    total = 0
+    jobs, pin = check_in_process(program, in_process, jobs, pin)
+    with analyzer_runners(program, server, in_process) as runners:
+        for cr, score in run_jobs(cases, jobs, pin):
+            r.flush(cr)
             total += score
 
     r.output(f"Total {total:0.2f}")
@@ -318,9 +661,29 @@ def test(suite, program, report, filter, fail_fast, with_python, timeout):
     type=click.File(mode="w"),
     help="A file to write the report to. (Good for golden testing)",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    show_default=True,
+    default=1,
+    type=click.IntRange(min=1),
+    help="number of cases to run in parallel.",
+)
+@click.option(
+    "--pin/--no-pin",
+    help="pin every job to a core of its own (for timing-sensitive runs).",
+)
+@click.option(
+    "--server/--no-server",
+    help="start the PROGRAM once per job as `PROGRAM serve` and send it the cases line by line (see `jpamb.serve`).",
+)
+@click.option(
+    "--in-process/--no-in-process",
+    help="run the PROGRAM, a python script, inside jpamb instead of starting a process per case.",
+)
 @click.argument("PROGRAM", nargs=-1)
 @click.pass_obj
-def interpret(suite, program, report, filter, with_python, timeout, stepwise):
+def interpret(suite, program, report, filter, with_python, timeout, stepwise, jobs, pin, server, in_process):
     """Use PROGRAM as an interpreter."""
 
     r = Reporter(report)
@@ -337,32 +700,48 @@ def interpret(suite, program, report, filter, with_python, timeout, stepwise):
         except IOError:
             last_case = None
 
-    total = 0
-    count = 0
-    for case in suite.cases:
-        if last_case and last_case != case:
-            continue
-        last_case = None
+    def run_case(case):
+        cr = r.buffered(jobs > 1)
+        try:
+            with cr.context(f"Case {case}"):
+                try:
+                    out = cr.run(
+                        program + (case.methodid.encode(), case.input.encode()),
+                        runner=runners(),
+                        timeout=timeout,
+                    )
+                    ret_undedited = out.splitlines()[-1].strip()
+                    #added this small part because our interpreter returns ex ok:27 and it compares it against ok. So, here is regex that strips the :27 part so that comparison works
+                    ret_match = re.match(r'^([^:]+)', ret_undedited)
+                    ret = ret_match.group(1)
+                except subprocess.TimeoutExpired:
+                    ret = "*"
+                except subprocess.CalledProcessError as e:
+                    log.error(e)
+                    ret = "failure"
+                cr.output(f"Expected {case.result!r} and got {ret!r}")
+        except BaseException:
+            r.flush(cr)
+            raise
+        return cr, case, ret
+
+    def selected():
+        nonlocal last_case
+        for case in suite.cases:
+            if last_case and last_case != case:
+                continue
+            last_case = None
 
-        if filter and not filter.search(str(case)):
-            continue
+            if filter and not filter.search(str(case)):
+                continue
+            yield lambda case=case: run_case(case)
 
-        with r.context(f"Case {case}"):
-            try:
-                out = r.run(
-                    program + (case.methodid.encode(), case.input.encode()),
-                    timeout=timeout,
-                )
-                ret_undedited = out.splitlines()[-1].strip()
-                #added this small part because our interpreter returns ex ok:27 and it compares it against ok. So, here is regex that strips the :27 part so that comparison works
-                ret_match = re.match(r'^([^:]+)', ret_undedited)
-                ret = ret_match.group(1)
-            except subprocess.TimeoutExpired:
-                ret = "*"
-            except subprocess.CalledProcessError as e:
-                log.error(e)
-                ret = "failure"
-            r.output(f"Expected {case.result!r} and got {ret!r}")
+    total = 0
+    count = 0
+    jobs, pin = check_in_process(program, in_process, jobs, pin)
+    with analyzer_runners(program, server, in_process) as runners:
+        for cr, case, ret in run_jobs(selected(), jobs, pin):
+            r.flush(cr)
             if case.result == ret:
                 total += 1
             elif stepwise:
@@ -404,20 +783,92 @@ def interpret(suite, program, report, filter, with_python, timeout, stepwise):
     type=click.File(mode="w"),
     help="A file to write the report to",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    show_default=True,
+    default=1,
+    type=click.IntRange(min=1),
+    help="number of cases to run in parallel.",
+)
+@click.option(
+    "--pin/--no-pin",
+    help="pin every job to a core of its own (for timing-sensitive runs).",
+)
+@click.option(
+    "--server/--no-server",
+    help="start the PROGRAM once per job as `PROGRAM serve` and send it the cases line by line (see `jpamb.serve`).",
+)
+@click.option(
+    "--calibrate-every",
+    show_default=True,
+    default=10.0,
+    type=click.FloatRange(min=0),
+    help="seconds between samples of the calibration workload (see `jpamb.calibration`).",
+)
+@click.option(
+    "--adaptive/--no-adaptive",
+    help="repeat every method (at least --iterations times) until the confidence interval of its time is within --target-ci.",
+)
+@click.option(
+    "--warmup",
+    type=click.IntRange(min=0),
+    help="number of unmeasured runs before the iterations of a method.  [default: 1 when --adaptive, else 0]",
+)
+@click.option(
+    "--target-ci",
+    show_default=True,
+    default=0.05,
+    type=click.FloatRange(min=0, min_open=True),
+    help="the half-width of the 95% confidence interval to reach in adaptive mode, as a fraction of the mean.",
+)
+@click.option(
+    "--max-iterations",
+    show_default=True,
+    default=30,
+    type=click.IntRange(min=1),
+    help="the number of iterations after which adaptive mode gives up.",
+)
+@click.option(
+    "--stream",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="write the result of every method to this JSON-lines file as soon as it is done.",
+)
+@click.option(
+    "--resume/--no-resume",
+    help="skip the methods already in the --stream file of an earlier run, and add to it.",
+)
 @click.argument("PROGRAM", nargs=-1)
-def evaluate(ctx, program, report, timeout, iterations, with_python):
+def evaluate(
+    ctx,
+    program,
+    report,
+    timeout,
+    iterations,
+    with_python,
+    jobs,
+    pin,
+    server,
+    calibrate_every,
+    adaptive,
+    warmup,
+    target_ci,
+    max_iterations,
+    stream,
+    resume,
+):
     """Evaluate the PROGRAM."""
 
-    program = resolve_cmd(program, with_python)
+    if resume and not stream:
+        raise click.UsageError("--resume needs the --stream file to resume from.")
 
-    def calibrate(count=100_000):
-        from time import perf_counter_ns
-        from jpamb import timer
-
-        start = perf_counter_ns()
-        timer.sieve(count)
-        end = perf_counter_ns()
-        return end - start
+    program = resolve_cmd(program, with_python)
+    if warmup is None:
+        warmup = 1 if adaptive else 0
+    if adaptive:
+        # an interval needs two samples
+        iterations = min(max(iterations, 2), max_iterations)
+    calibration = Calibration(interval=calibrate_every)
 
     try:
         (out, _) = run(
@@ -432,59 +883,115 @@ def evaluate(ctx, program, report, timeout, iterations, with_python):
         for o in out.splitlines():
             log.error(o)
 
+    def times(results):
+        return [r["time"] for r in results]
+
+    def run_once(methodid, correct, i):
+        # the resource usage is only known for a process of its own
+        usage = dict(maxrss=None, utime=None, stime=None)
+        with calibration.job() as reference:
+            if analyzer := runners():
+                out, time = analyzer.request(
+                    (methodid.encode(),), logerr=log.debug, timeout=timeout
+                )
+            else:
+                cp = runner.run(
+                    program + (methodid.encode(),), logerr=log.debug, timeout=timeout
+                )
+                out, time = cp.stdout, cp.time
+                usage = dict(maxrss=cp.maxrss, utime=cp.utime, stime=cp.stime)
+        response = model.Response.parse(out)
+
+        return {
+            "iteration": i,
+            "response": {k: v.wager for k, v in response.predictions.items()},
+            "score": response.score(correct),
+            "time": time,
+            **usage,
+            "relative": math.log10(time / reference),
+            "calibration": reference,
+        }
+
+    def run_method(methodid, correct):
+        log.success(f"Running on {methodid}")
+
+        warmups = []
+        for i in range(warmup):
+            log.info(f"Warming up on {methodid}, iter {i}")
+            warmups.append(run_once(methodid, correct, i))
+
+        results = []
+        while True:
+            i = len(results)
+            log.info(f"Running on {methodid}, iter {i}")
+            results.append(run_once(methodid, correct, i))
+            if len(results) < iterations:
+                continue
+            if not adaptive or len(results) >= max_iterations:
+                break
+            kept = [t for t, o in zip(times(results), outliers(times(results))) if not o]
+            if Summary.of(kept).converged(target_ci):
+                break
+
+        rejected = outliers(times(results))
+        kept = [r for r, o in zip(results, rejected) if not o]
+        for r, o in zip(results, rejected):
+            r["outlier"] = o
+        time = Summary.of(times(kept))
+        relative = Summary.of([r["relative"] for r in kept])
+
+        maxrss = [r["maxrss"] for r in results if r["maxrss"] is not None]
+        return methodid, {
+            "score": statistics.fmean(r["score"] for r in results),
+            "time": time.mean,
+            "maxrss": sum(maxrss) / len(maxrss) if maxrss else None,
+            "relative": relative.mean,
+            "timing": time.asdict(),
+            "relative_timing": relative.asdict(),
+            "outliers": sum(rejected),
+            "converged": time.converged(target_ci),
+            # numbered apart, the measured iterations start at 0 after the warm-ups
+            "warmups": warmups,
+            "iterations": results,
+        }
+
     total_score = 0
     total_time = 0
     total_relative = 0
     total_methods = 0
     bymethod = {}
 
-    for methodid, correct in ctx.obj.case_methods():
-        log.success(f"Running on {methodid}")
-        results = []
+    if resume:
+        bymethod = read_stream(stream)
+        log.success(f"Resuming, {len(bymethod)} methods are done already")
 
-        _score = 0
-        _time = 0
-        _relative = 0
-        for i in range(iterations):
-            log.info(f"Running on {methodid}, iter {i}")
-            r1 = calibrate()
-            out, time = run(
-                program + (methodid.encode(),), logerr=log.debug, timeout=timeout
-            )
-            r2 = calibrate()
-            response = model.Response.parse(out)
-            score = response.score(correct)
-            relative = math.log10(time / (r1 + r2) * 2)
-
-            result = {k: v.wager for k, v in response.predictions.items()}
-
-            results.append(
-                {
-                    "iteration": i,
-                    "response": result,
-                    "score": score,
-                    "time": time,
-                    "relative": relative,
-                    "calibrates": [r1, r2],
-                }
-            )
+    def add(methodid, entry):
+        nonlocal total_score, total_time, total_relative, total_methods
+        bymethod[str(methodid)] = entry
 
-            _score += score
-            _relative += relative
-            _time += time
+        total_score += entry["score"]
+        total_time += entry["time"]
+        total_relative += entry["relative"]
 
-        bymethod[str(methodid)] = {
-            "score": _score / iterations,
-            "time": _time / iterations,
-            "relative": _relative / iterations,
-            "iterations": results,
-        }
+        total_methods += 1
 
-        total_score += _score / iterations
-        total_time += _time / iterations
-        total_relative += _relative / iterations
+    for methodid, entry in list(bymethod.items()):
+        add(methodid, entry)
 
-        total_methods += 1
+    methods = (
+        (lambda m=methodid, c=correct: run_method(m, c))
+        for methodid, correct in ctx.obj.case_methods()
+        if str(methodid) not in bymethod
+    )
+    with (
+        open(stream, "a" if resume else "w") if stream else nullcontext() as out,
+        analyzer_runners(program, server) as runners,
+    ):
+        for methodid, entry in run_jobs(methods, jobs, pin):
+            add(methodid, entry)
+            if out:
+                out.write(json.dumps({"method": str(methodid), **entry}) + "\n")
+                out.flush()
 
     json.dump(
         {
@@ -492,7 +999,20 @@ def evaluate(ctx, program, report, timeout, iterations, with_python):
             "bymethod": bymethod,
             "score": total_score,
             "time": total_time / total_methods,
+            # the peak over all methods, in KiB
+            "maxrss": max(
+                (e["maxrss"] for e in bymethod.values() if e.get("maxrss") is not None),
+                default=None,
+            ),
             "relative": total_relative / total_methods,
+            "calibration": calibration.report(),
+            "benchmark": {
+                "adaptive": adaptive,
+                "warmup": warmup,
+                "target_ci": target_ci,
+                "max_iterations": max_iterations,
+                "converged": sum(bool(e.get("converged")) for e in bymethod.values()),
+            },
         },
         report,
         indent=2,
@@ -18,6 +18,49 @@ from dataclasses import dataclass
 from typing import Callable, Protocol, Self, Iterable, Optional, Iterator, NoReturn
 
 
+# The names, types and ids below are immutable, and the same few of them are
+# decoded over and over. So decoding is memoized (see `_decoded`), every decoded
+# object is the shared instance from `intern`, and their hashes are cached.
+
+# the canonical instance of every interned object
+_INTERNED: dict = {}
+
+
+def intern[T](value: T) -> T:
+    """The canonical (shared) instance of an immutable jvm object equal to `value`."""
+    if (v := _INTERNED.get(value)) is None:
+        v = _INTERNED.setdefault(value, value)
+    return v
+
+
+def _decoded[T](table: dict[str, T], input: str, decode: Callable[[str], T]) -> T:
+    """`decode(input)`, decoded once per `table`."""
+    if (v := table.get(input)) is None:
+        v = table.setdefault(input, decode(input))
+    return v
+
+
+def _cached_hash(cls):
+    """Cache the hash of the instances of a frozen dataclass (not pickled, as
+    string hashes differ between processes)."""
+    fields_hash = cls.__hash__
+
+    def __hash__(self):
+        try:
+            return self.__dict__["_hash"]
+        except KeyError:
+            h = self.__dict__["_hash"] = fields_hash(self)
+            return h
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k != "_hash"}
+
+    cls.__hash__ = __hash__
+    cls.__getstate__ = __getstate__
+    return cls
+
+
+@_cached_hash
 @dataclass(frozen=True, order=True)
 class ClassName:
     """The name of a class, inner classes must use the $ syntax"""
@@ -61,13 +104,17 @@ class ClassName:
 
     @staticmethod
     def decode(input: str) -> "ClassName":
-        return ClassName(input)
+        return _decoded(_CLASSNAMES, input, lambda i: intern(ClassName(i)))
 
     @staticmethod
     def from_parts(*args: str) -> "ClassName":
         return ClassName(".".join(args))
 
 
+_CLASSNAMES: dict[str, ClassName] = {}
+_TYPES: dict[str, tuple["Type", str]] = {}
+
+
 @total_ordering
 class Type(ABC):
     """A jvm type"""
@@ -83,6 +130,10 @@ class Type(ABC):
 
     @staticmethod
     def decode(input) -> tuple["Type", str]:
+        return _decoded(_TYPES, input, Type._decode)
+
+    @staticmethod
+    def _decode(input) -> tuple["Type", str]:
         r, stack = None, []
         i = 0
         r = None
@@ -148,19 +199,9 @@ class Type(ABC):
     @staticmethod
     def from_json(json: str) -> "Type":
         if isinstance(json, str):
-            match json:
-                case "integer":
-                    return Int()
-                case "int":
-                    return Int()
-                case "char":
-                    return Char()
-                case "short":
-                    return Short()
-                case "ref":
-                    return Reference()
-                case "boolean":
-                    return Boolean()
+            if (t := _JSON_TYPES.get(json)) is not None:
+                return t
+            raise NotImplementedError(f"Type.from_json: {json!r}")
         if "base" in json:
             return Type.from_json(json["base"])
         if "kind" in json:
@@ -310,6 +351,7 @@ class Reference(StackType):
         return "ref"
 
 
+@_cached_hash
 @dataclass(frozen=True, order=True)
 class Object(Type):
     """
@@ -335,6 +377,7 @@ class Object(Type):
         return f"object {self.name}"
 
 
+@_cached_hash
 @dataclass(frozen=True, order=True)
 class Array(Type):
     """
@@ -420,6 +463,18 @@ class Double(StackType):
         return "double"
 
 
+# the (singleton) types by their name in the jvm2json output
+_JSON_TYPES: dict[str, Type] = {
+    "integer": Int(),
+    "int": Int(),
+    "char": Char(),
+    "short": Short(),
+    "ref": Reference(),
+    "boolean": Boolean(),
+}
+
+
+@_cached_hash
 @dataclass(frozen=True, order=True)
 class ParameterType:
     """A list of parameters types"""
@@ -440,12 +495,16 @@ class ParameterType:
 
     @staticmethod
     def decode(input: str) -> "ParameterType":
+        return _decoded(_PARAMETER_TYPES, input, ParameterType._decode)
+
+    @staticmethod
+    def _decode(input: str) -> "ParameterType":
         params = []
         while input:
             (tt, input) = Type.decode(input)
             params.append(tt)
 
-        return ParameterType(tuple(params))
+        return intern(ParameterType(tuple(params)))
 
     @staticmethod
     def from_json(inputs: list[dict], annotated=False) -> "ParameterType":
@@ -467,6 +526,7 @@ METHOD_ID_RE_RAW = r"(?P<method_name>.*)\:\((?P<params>.*)\)(?P<return>.*)"
 METHOD_ID_RE = re.compile(METHOD_ID_RE_RAW)
 
 
+@_cached_hash
 @dataclass(frozen=True, order=True)
 class MethodID:
     """A method ID consist of a name, a list of parameter types and a return type."""
@@ -477,6 +537,10 @@ class MethodID:
 
     @staticmethod
     def decode(input: str):
+        return _decoded(_METHOD_IDS, input, MethodID._decode)
+
+    @staticmethod
+    def _decode(input: str):
         if (match := METHOD_ID_RE.match(input)) is None:
             raise ValueError("invalid method name: %r", input)
 
@@ -488,10 +552,12 @@ class MethodID:
                     f"could not decode method id, bad return type {match['return']!r}"
                 )
 
-        return MethodID(
-            name=match["method_name"],
-            params=ParameterType.decode(match["params"]),
-            return_type=return_type,
+        return intern(
+            MethodID(
+                name=match["method_name"],
+                params=ParameterType.decode(match["params"]),
+                return_type=return_type,
+            )
         )
 
     def encode(self) -> str:
@@ -499,6 +565,7 @@ class MethodID:
         return f"{self.name}:({self.params.encode()}){rt}"
 
 
+@_cached_hash
 @dataclass(frozen=True, order=True)
 class FieldID:
     """A field ID consists of a name and a type."""
@@ -511,18 +578,27 @@ class FieldID:
 
     @staticmethod
     def decode(input: str) -> "FieldID":
+        return _decoded(_FIELD_IDS, input, FieldID._decode)
+
+    @staticmethod
+    def _decode(input: str) -> "FieldID":
         if ":" not in input:
             raise ValueError(f"invalid field id format: {input}")
         name, type_str = input.split(":", 1)
         type_obj, remaining = Type.decode(type_str)
         if remaining:
             raise ValueError(f"extra characters in field type: {remaining}")
-        return FieldID(name=name, type=type_obj)
+        return intern(FieldID(name=name, type=type_obj))
 
     def __str__(self) -> str:
         return self.encode()
 
 
+_PARAMETER_TYPES: dict[str, ParameterType] = {}
+_METHOD_IDS: dict[str, MethodID] = {}
+_FIELD_IDS: dict[str, FieldID] = {}
+
+
 class Encodable(Protocol):
     def encode(self) -> str: ...
 
@@ -530,6 +606,7 @@ class Encodable(Protocol):
 ABSOLUTE_RE = re.compile(r"(?P<class_name>.+)\.(?P<rest>.*)")
 
 
+@_cached_hash
 @dataclass(frozen=True, order=True)
 class Absolute[T: Encodable](ABC):
     classname: ClassName
@@ -542,10 +619,18 @@ class Absolute[T: Encodable](ABC):
 
     @classmethod
     def decode(cls, input, decode: Callable[[str], T]) -> "Self":
+        if (decoded := _ABSOLUTES.get(cls)) is None:
+            decoded = _ABSOLUTES.setdefault(cls, {})
+        if (absolute := decoded.get(input)) is not None:
+            return absolute
+
         if (match := ABSOLUTE_RE.match(input)) is None:
             raise ValueError("invalid absolute method name: %r", input)
 
-        return cls(ClassName.decode(match["class_name"]), decode(match["rest"]))
+        absolute = intern(
+            cls(ClassName.decode(match["class_name"]), decode(match["rest"]))
+        )
+        return decoded.setdefault(input, absolute)
 
     def encode(self) -> str:
         return f"{self.classname.encode()}.{self.extension.encode()}"
@@ -554,6 +639,10 @@ class Absolute[T: Encodable](ABC):
         return self.encode()
 
 
+# the decoded absolute ids, by their class
+_ABSOLUTES: dict[type, dict[str, Absolute]] = {}
+
+
 class AbsMethodID(Absolute[MethodID]):
 
     @classmethod
@@ -566,18 +655,29 @@ class AbsMethodID(Absolute[MethodID]):
 
     @classmethod
     def from_json(cls, json: dict) -> "Self":
-        return cls(
-            classname=ClassName.decode(json["ref"]["name"]),
-            extension=MethodID(
-                name=json["name"],
-                params=ParameterType.from_json(json["args"]),
-                return_type=(
-                    Type.from_json(json["returns"])
-                    if json["returns"] is not None
-                    else None
-                ),
-            ),
+        classname, name = json["ref"]["name"], json["name"]
+        params = ParameterType.from_json(json["args"])
+        return_type = (
+            Type.from_json(json["returns"]) if json["returns"] is not None else None
         )
+        # interned, every call site of a method has the same id
+        key = (classname, name, params, return_type)
+        if (absmethod := _ABS_METHODS.get(key)) is None:
+            absmethod = _ABS_METHODS.setdefault(
+                key,
+                intern(
+                    cls(
+                        classname=ClassName.decode(classname),
+                        extension=intern(
+                            MethodID(name=name, params=params, return_type=return_type)
+                        ),
+                    )
+                ),
+            )
+        return absmethod
+
+
+_ABS_METHODS: dict[tuple, AbsMethodID] = {}
 
 
 class AbsFieldID(Absolute[FieldID]):
@@ -598,6 +698,8 @@ class Value:
 
     @staticmethod
     def decode_many(input) -> list["Value"]:
+        if (values := ValueParser.parse_simple(input)) is not None:
+            return values
         vp = ValueParser(input)
         values = vp.parse_comma_seperated_values()
         vp.eof()
@@ -605,6 +707,8 @@ class Value:
 
     @staticmethod
     def decode(input) -> list["Value"]:
+        if (values := ValueParser.parse_simple(input)) is not None:
+            return values
         vp = ValueParser(input)
         value = vp.parse_comma_seperated_values()
         vp.eof()
@@ -671,6 +775,22 @@ class Value:
         return f"({self.type.math()} {self.value})"
 
 
+VALUE_TOKENS = [
+    ("OPEN_ARRAY", r"\[[IC]:"),
+    ("CLOSE_ARRAY", r"\]"),
+    ("INT", r"-?\d+"),
+    ("OBJECT", r"new [A-Za-z0-9_./\$]+\([^)]*\)"),
+    ("BOOL", r"true|false"),
+    ("CHAR", r"'[^']'"),
+    ("COMMA", r","),
+    ("SKIP", r"[ \t]+"),
+]
+VALUE_TOKEN_RE = re.compile("|".join(f"(?P<{n}>{m})" for n, m in VALUE_TOKENS))
+INT_RE = re.compile(r"-?\d+")
+CHAR_RE = re.compile(r"'[^']'")
+OBJECT_RE = re.compile(r"^new\s+([A-Za-z0-9_./\$]+)\(([^\)]*)\)$")
+
+
 @dataclass
 class ValueParser:
     Token = namedtuple("Token", "kind value")
@@ -681,28 +801,41 @@ class ValueParser:
 
     def __init__(self, input) -> None:
         self.input = input
-        self._tokens = ValueParser.tokenize(input)
+        self._tokens = iter(ValueParser.tokenize(input))
         self.next()
 
     @staticmethod
-    def tokenize(string):
-        token_specification = [
-            ("OPEN_ARRAY", r"\[[IC]:"),
-            ("CLOSE_ARRAY", r"\]"),
-            ("INT", r"-?\d+"),
-            ("OBJECT", r"new [A-Za-z0-9_./\$]+\([^)]*\)"), 
-            ("BOOL", r"true|false"),
-            ("CHAR", r"'[^']'"),
-            ("COMMA", r","),
-            ("SKIP", r"[ \t]+"),
+    def tokenize(string) -> list["ValueParser.Token"]:
+        Token = ValueParser.Token
+        return [
+            Token(m.lastgroup, m.group())
+            for m in VALUE_TOKEN_RE.finditer(string)
+            if m.lastgroup != "SKIP"
         ]
-        tok_regex = "|".join(f"(?P<{n}>{m})" for n, m in token_specification)
 
-        for m in re.finditer(tok_regex, string):
-            kind, value = m.lastgroup, m.group()
-            if kind == "SKIP":
-                continue
-            yield ValueParser.Token(kind, value)
+    @staticmethod
+    def parse_simple(string) -> list[Value] | None:
+        """
+        Parse a list of only ints, chars and booleans (the common case) without
+        the tokenizer, or return None if there is anything else in it.
+        """
+        body = string.strip(" \t")
+        if body[:1] == "(" and body[-1:] == ")":
+            body = body[1:-1]
+        if not body.strip(" \t"):
+            return []
+        values = []
+        for item in body.split(","):
+            item = item.strip(" \t")
+            if INT_RE.fullmatch(item):
+                values.append(Value.int(int(item)))
+            elif CHAR_RE.fullmatch(item):
+                values.append(Value.char(item[1]))
+            elif item == "true" or item == "false":
+                values.append(Value.boolean(item == "true"))
+            else:
+                return None
+        return values
 
     @staticmethod
     def parse(string) -> list[Value]:
@@ -780,7 +913,7 @@ class ValueParser:
     def parse_object(self):
         obj = self.expect("OBJECT")
         
-        match = re.match(r"^new\s+([A-Za-z0-9_./\$]+)\(([^\)]*)\)$", obj.value)
+        match = OBJECT_RE.match(obj.value)
         classname_str = match.group(1)
         args_str = match.group(2)
         #TODO - make it work for many arguments.....
@@ -12,12 +12,17 @@ from abc import ABC, abstractmethod
 from typing import Self
 
 import enum
+import os
 import sys
 from loguru import logger
 from jpamb.jvm import base as jvm
 
 logger.add(sys.stderr, format="[{level}] {message}")
 
+# check the field types of every opcode on construction (JPAMB_CHECKED=1), this
+# is slow, so it is meant for debugging the decoding
+CHECKED = os.environ.get("JPAMB_CHECKED", "0") not in ("", "0")
+
 
 @dataclass(frozen=True, order=True)
 class Opcode(ABC):
@@ -26,6 +31,11 @@ class Opcode(ABC):
     offset: int
 
     def __post_init__(self):
+        if CHECKED:
+            self.check()
+
+    def check(self):
+        """Check the types of all fields (done on construction in checked mode)."""
         for f in fields(self):
             v = getattr(self, f.name)
             assert isinstance(
@@ -35,62 +45,18 @@ class Opcode(ABC):
     @classmethod
     def from_json(cls, json: dict) -> "Opcode":
         match json["opr"]:
-            case "put":
-                opr = Put
-            case "push":
-                opr = Push
-            case "newarray":
-                opr = NewArray
-            case "dup":
-                opr = Dup
-            case "array_store":
-                opr = ArrayStore
-            case "array_load":
-                opr = ArrayLoad
-            case "binary":
-                opr = Binary
-            case "store":
-                opr = Store
-            case "load":
-                opr = Load
-            case "arraylength":
-                opr = ArrayLength
-            case "if":
-                opr = If
-            case "get":
-                opr = Get
-            case "ifz":
-                opr = Ifz
-            case "cast":
-                opr = Cast
-            case "new":
-                opr = New
-            case "throw":
-                opr = Throw
-            case "incr":
-                opr = Incr
-            case "goto":
-                opr = Goto
-            case "return":
-                opr = Return
             case "invoke":
-                match json["access"]:
-                    case "virtual":
-                        opr = InvokeVirtual
-                    case "static":
-                        opr = InvokeStatic
-                    case "interface":
-                        opr = InvokeInterface
-                    case "special":
-                        opr = InvokeSpecial
-                    case access:
-                        raise NotImplementedError(
-                            f"Unhandled invoke access {access!r} (implement yourself)"
-                        )
-            case opr:
-                raise NotImplementedError(
-                    f"Unhandled opcode {opr!r} (implement yourself)"
-                )
+                opr = INVOKES.get(json["access"])
+                if opr is None:
+                    raise NotImplementedError(
+                        f"Unhandled invoke access {json['access']!r} (implement yourself)"
+                    )
+            case name:
+                opr = OPCODES.get(name)
+                if opr is None:
+                    raise NotImplementedError(
+                        f"Unhandled opcode {name!r} (implement yourself)"
+                    )
         try:
             return opr.from_json(json)
         except NotImplementedError as e:
@@ -1138,3 +1104,35 @@ class Return(Opcode):
     def __str__(self):
         type = str(self.type) if self.type is not None else "V"
         return f"return:{type}"
+
+
+# the opcode classes by the "opr" of their jvm2json output
+OPCODES: dict[str, type[Opcode]] = {
+    "put": Put,
+    "push": Push,
+    "newarray": NewArray,
+    "dup": Dup,
+    "array_store": ArrayStore,
+    "array_load": ArrayLoad,
+    "binary": Binary,
+    "store": Store,
+    "load": Load,
+    "arraylength": ArrayLength,
+    "if": If,
+    "get": Get,
+    "ifz": Ifz,
+    "cast": Cast,
+    "new": New,
+    "throw": Throw,
+    "incr": Incr,
+    "goto": Goto,
+    "return": Return,
+}
+
+# the invoke opcode classes by their "access"
+INVOKES: dict[str, type[Opcode]] = {
+    "virtual": InvokeVirtual,
+    "static": InvokeStatic,
+    "interface": InvokeInterface,
+    "special": InvokeSpecial,
+}
@@ -7,6 +7,7 @@ This module provides the basic data model for working with the JPAMB.
 
 from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from loguru import logger
 import collections
@@ -29,15 +30,26 @@ class Input:
 
     @staticmethod
     def decode(input: str) -> "Input":
-        if input[0] != "(" and input[-1] != ")":
-            raise ValueError(f"Expected input to be in parenthesis, but got {input}")
-        values = jvm.Value.decode_many(input)
-        return Input(tuple(values))
+        if "new " in input:
+            # the value of an object is a (mutable) dict, so it is not shared
+            return _decode_input(input)
+        return _decode_input_cached(input)
 
     def encode(self) -> str:
         return "(" + ", ".join(v.encode() for v in self.values) + ")"
 
 
+def _decode_input(input: str) -> Input:
+    if input[0] != "(" and input[-1] != ")":
+        raise ValueError(f"Expected input to be in parenthesis, but got {input}")
+    values = jvm.Value.decode_many(input)
+    return Input(tuple(values))
+
+
+# fuzzers submit the same inputs over and over
+_decode_input_cached = lru_cache(maxsize=4096)(_decode_input)
+
+
 CASE_RE = re.compile(r"([^ ]*) +(\([^)]*\)) -> (.*)")
 
 
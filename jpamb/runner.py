@@ -0,0 +1,197 @@
+"""jpamb.runner
+
+This module runs child processes. All their pipes are drained by a single
+asyncio event loop (instead of two threads per process), their output is
+logged line by line, and every process is reaped with `os.wait4`, so its
+resource usage is known next to its wall-clock time.
+
+Each child runs in a process group of its own, a timeout kills the whole
+group (including anything the program started itself). So does an output line
+longer than `LINE_LIMIT`, which is reported as a failure of the process.
+"""
+
+import asyncio
+import os
+import signal
+import subprocess
+import threading
+from dataclasses import dataclass
+from time import perf_counter_ns
+from typing import Callable
+
+# limit on the length of a single output line
+LINE_LIMIT = 1 << 24
+
+
+@dataclass(frozen=True)
+class Completed:
+    """A finished child process."""
+
+    cmd: list[str]
+    returncode: int
+    stdout: str
+    stderr: str
+    # wall-clock time from start to exit, in nanoseconds
+    time: int
+    # peak resident set size, in KiB
+    maxrss: int
+    # user and system CPU time, in seconds
+    utime: float
+    stime: float
+
+
+def _spawn(cmd, kwargs) -> subprocess.Popen:
+    kwargs.pop("text", None)
+    return subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        process_group=0,
+        **kwargs,
+    )
+
+
+async def _lines(stream, loop, log: Callable[[str], None] | None) -> str:
+    """Read `stream` to the end, passing every line (without newline) to `log`."""
+    reader = asyncio.StreamReader(limit=LINE_LIMIT, loop=loop)
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader, loop=loop), stream
+    )
+    lines = []
+    try:
+        while line := await reader.readline():
+            text = line.decode(errors="replace").replace("\r\n", "\n")
+            lines.append(text)
+            if log:
+                log(text.removesuffix("\n"))
+    finally:
+        transport.close()
+    return "".join(lines)
+
+
+async def _wait4(pid: int, loop):
+    """Reap `pid` without blocking the loop (through a pidfd where there is one).
+
+    Returns the wait status, the resource usage and the time of the exit.
+    """
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:
+            pidfd = None
+        if pidfd is not None:
+            exited = loop.create_future()
+            loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+            try:
+                await exited
+            finally:
+                loop.remove_reader(pidfd)
+                os.close(pidfd)
+            _, status, rusage = os.wait4(pid, 0)
+            return status, rusage, perf_counter_ns()
+    _, status, rusage = await loop.run_in_executor(None, os.wait4, pid, 0)
+    return status, rusage, perf_counter_ns()
+
+
+def _kill_group(proc: subprocess.Popen):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _communicate(proc, cmd, start_ns, timeout, logout, logerr) -> Completed:
+    loop = asyncio.get_running_loop()
+    stdout = asyncio.ensure_future(_lines(proc.stdout, loop, logout))
+    stderr = asyncio.ensure_future(_lines(proc.stderr, loop, logerr))
+    exited = asyncio.ensure_future(_wait4(proc.pid, loop))
+    try:
+        # the output is complete once every process of the group closed the pipes
+        _, pending = await asyncio.wait(
+            [stdout, stderr, exited],
+            timeout=timeout or None,
+            return_when=asyncio.FIRST_EXCEPTION,
+        )
+    except BaseException:
+        _kill_group(proc)
+        raise
+    # readline raises ValueError on a line longer than LINE_LIMIT
+    overrun = next((t.exception() for t in (stdout, stderr) if t.done() and t.exception()), None)
+    if overrun is not None:
+        _kill_group(proc)
+        status, _, _ = await exited
+        await asyncio.gather(stdout, stderr, return_exceptions=True)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        raise subprocess.CalledProcessError(
+            proc.returncode, cmd, stderr=f"output line longer than {LINE_LIMIT} bytes"
+        ) from overrun
+    if pending:
+        _kill_group(proc)
+        # the group is dead, so the pipes close and the process can be reaped
+        status, _, _ = await exited
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        raise subprocess.TimeoutExpired(
+            cmd, timeout, output=await stdout, stderr=await stderr
+        )
+    status, rusage, end_ns = exited.result()
+    out, err = stdout.result(), stderr.result()
+
+    proc.returncode = returncode = os.waitstatus_to_exitcode(status)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, output=out, stderr=err)
+    return Completed(
+        cmd=cmd,
+        returncode=returncode,
+        stdout=out,
+        stderr=err,
+        time=end_ns - start_ns,
+        maxrss=rusage.ru_maxrss,
+        utime=rusage.ru_utime,
+        stime=rusage.ru_stime,
+    )
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    """The event loop draining the pipes of all processes started by `run`."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="jpamb-runner", daemon=True).start()
+        return _loop
+
+
+def run(
+    cmd: list[str],
+    /,
+    timeout: float | None = 2.0,
+    logout: Callable[[str], None] | None = None,
+    logerr: Callable[[str], None] | None = None,
+    **kwargs,
+) -> Completed:
+    """Run `cmd` and wait for it.
+
+    Raises `subprocess.CalledProcessError` on a non-zero exit code (or an
+    overlong output line) and `subprocess.TimeoutExpired` after `timeout` seconds.
+
+    The process is started by the calling thread, so it inherits that thread's
+    CPU affinity; its output is handled on the shared runner loop.
+    """
+    cmd = list(map(str, cmd))
+    start_ns = perf_counter_ns()
+    proc = _spawn(cmd, kwargs)
+    future = asyncio.run_coroutine_threadsafe(
+        _communicate(proc, cmd, start_ns, timeout, logout, logerr), _shared_loop()
+    )
+    try:
+        return future.result()
+    except BaseException:
+        # e.g. a KeyboardInterrupt while waiting: do not leave the process behind
+        if proc.returncode is None:
+            _kill_group(proc)
+        raise
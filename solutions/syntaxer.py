@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """A very stupid syntatic analysis, that only checks for assertion errors."""
 
+import functools
 import logging
 import tree_sitter
 import tree_sitter_java
@@ -9,15 +10,6 @@ import sys
 from pathlib import Path
 
 
-methodid = jpamb.getmethodid(
-    "syntaxer",
-    "1.0",
-    "The Rice Theorem Cookers",
-    ["syntatic", "python"],
-    for_science=True,
-)
-
-
 JAVA_LANGUAGE = tree_sitter.Language(tree_sitter_java.language())
 parser = tree_sitter.Parser(JAVA_LANGUAGE)
 
@@ -25,94 +17,111 @@ log = logging
 log.basicConfig(level=logging.DEBUG)
 
 
-srcfile = jpamb.sourcefile(methodid).relative_to(Path.cwd())
+@functools.cache
+def parse(srcfile):
+    # a server (see `jpamb.serve`) parses every source file only once
+    with open(srcfile, "rb") as f:
+        log.debug("parse sourcefile %s", srcfile)
+        return parser.parse(f.read())
 
-with open(srcfile, "rb") as f:
-    log.debug("parse sourcefile %s", srcfile)
-    tree = parser.parse(f.read())
 
-simple_classname = str(methodid.classname.name)
+def main():
+    methodid = jpamb.getmethodid(
+        "syntaxer",
+        "1.0",
+        "The Rice Theorem Cookers",
+        ["syntatic", "python"],
+        for_science=True,
+    )
 
-log.debug(f"{simple_classname}")
+    srcfile = jpamb.sourcefile(methodid).relative_to(Path.cwd())
+    tree = parse(srcfile)
 
-# To figure out how to write these you can consult the
-# https://tree-sitter.github.io/tree-sitter/playground
-class_q = tree_sitter.Query(
-    JAVA_LANGUAGE,
-    f"""
-    (class_declaration 
-        name: ((identifier) @class-name 
-               (#eq? @class-name "{simple_classname}"))) @class
-""",
-)
+    simple_classname = str(methodid.classname.name)
 
-for node in tree_sitter.QueryCursor(class_q).captures(tree.root_node)["class"]:
-    break
-else:
-    log.error(f"could not find a class of name {simple_classname} in {srcfile}")
+    log.debug(f"{simple_classname}")
 
-    sys.exit(-1)
+    # To figure out how to write these you can consult the
+    # https://tree-sitter.github.io/tree-sitter/playground
+    class_q = tree_sitter.Query(
+        JAVA_LANGUAGE,
+        f"""
+        (class_declaration 
+            name: ((identifier) @class-name 
+                   (#eq? @class-name "{simple_classname}"))) @class
+    """,
+    )
 
-# log.debug("Found class %s", node.range)
+    for node in tree_sitter.QueryCursor(class_q).captures(tree.root_node)["class"]:
+        break
+    else:
+        log.error(f"could not find a class of name {simple_classname} in {srcfile}")
 
-method_name = methodid.extension.name
+        sys.exit(-1)
 
-method_q = tree_sitter.Query(
-    JAVA_LANGUAGE,
-    f"""
-    (method_declaration name: 
-      ((identifier) @method-name (#eq? @method-name "{method_name}"))
-    ) @method
-""",
-)
+    # log.debug("Found class %s", node.range)
 
-for node in tree_sitter.QueryCursor(method_q).captures(node)["method"]:
+    method_name = methodid.extension.name
 
-    if not (p := node.child_by_field_name("parameters")):
-        log.debug(f"Could not find parameteres of {method_name}")
-        continue
+    method_q = tree_sitter.Query(
+        JAVA_LANGUAGE,
+        f"""
+        (method_declaration name: 
+          ((identifier) @method-name (#eq? @method-name "{method_name}"))
+        ) @method
+    """,
+    )
 
-    params = [c for c in p.children if c.type == "formal_parameter"]
+    for node in tree_sitter.QueryCursor(method_q).captures(node)["method"]:
 
-    if len(params) != len(methodid.extension.params):
-        continue
+        if not (p := node.child_by_field_name("parameters")):
+            log.debug(f"Could not find parameteres of {method_name}")
+            continue
 
-    # log.debug(methodid.extension.params)
-    # log.debug(params)
+        params = [c for c in p.children if c.type == "formal_parameter"]
 
-    for tn, t in zip(methodid.extension.params, params):
-        if (tp := t.child_by_field_name("type")) is None:
-            break
+        if len(params) != len(methodid.extension.params):
+            continue
 
-        if tp.text is None:
-            break
+        # log.debug(methodid.extension.params)
+        # log.debug(params)
+
+        for tn, t in zip(methodid.extension.params, params):
+            if (tp := t.child_by_field_name("type")) is None:
+                break
 
-        # todo check for type.
+            if tp.text is None:
+                break
+
+            # todo check for type.
+        else:
+            break
     else:
-        break
-else:
-    log.warning(f"could not find a method of name {method_name} in {simple_classname}")
-    sys.exit(-1)
+        log.warning(f"could not find a method of name {method_name} in {simple_classname}")
+        sys.exit(-1)
 
-# log.debug("Found method %s %s", method_name, node.range)
+    # log.debug("Found method %s %s", method_name, node.range)
 
-body = node.child_by_field_name("body")
-assert body and body.text
-for t in body.text.splitlines():
-    log.debug("line: %s", t.decode())
+    body = node.child_by_field_name("body")
+    assert body and body.text
+    for t in body.text.splitlines():
+        log.debug("line: %s", t.decode())
 
-assert_q = tree_sitter.Query(JAVA_LANGUAGE, """(assert_statement) @assert""")
+    assert_q = tree_sitter.Query(JAVA_LANGUAGE, """(assert_statement) @assert""")
+
+
+    assert_found = any(
+        capture_name == "assert"
+        for capture_name, _ in tree_sitter.QueryCursor(assert_q).captures(body).items()
+    )
+    if assert_found:
+        log.debug("Found assertion")
+        print("assertion error;80%")
+    else:
+        log.debug("No assertion")
+        print("assertion error;20%")
 
+    sys.exit(0)
 
-assert_found = any(
-    capture_name == "assert"
-    for capture_name, _ in tree_sitter.QueryCursor(assert_q).captures(body).items()
-)
-if assert_found:
-    log.debug("Found assertion")
-    print("assertion error;80%")
-else:
-    log.debug("No assertion")
-    print("assertion error;20%")
 
-sys.exit(0)
+jpamb.serve(main)
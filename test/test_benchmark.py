@@ -0,0 +1,16 @@
+from jpamb.benchmark import Summary, outliers, percentile
+
+
+def test_outliers_need_enough_samples():
+    assert outliers([1, 1, 100]) == [False, False, False]
+    assert outliers([10, 11, 10, 12, 11, 100]) == [False] * 5 + [True]
+
+
+def test_summary():
+    s = Summary.of([10, 12, 11, 13, 9])
+    assert s.mean == 11 and s.median == 11
+    assert percentile([1, 2, 3, 4, 5], 95) == 4.8
+    lo, hi = s.ci
+    assert lo < 11 < hi
+    assert s.converged(0.5) and not s.converged(0.01)
+    assert not Summary.of([10]).converged(1.0)
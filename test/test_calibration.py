@@ -0,0 +1,32 @@
+from jpamb import calibration
+from jpamb.calibration import Calibration
+
+
+def test_no_sample_while_a_job_runs(monkeypatch):
+    import threading
+    import time
+
+    c = Calibration(interval=0, warmup=1)
+    busy = []
+
+    def sample(count):
+        busy.append(c.active)
+        return 1000
+
+    monkeypatch.setattr(calibration, "sample", sample)
+
+    def job():
+        for _ in range(5):
+            with c.job() as reference:
+                assert reference == 1000
+                time.sleep(0.01)
+
+    threads = [threading.Thread(target=job) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # every job found a sample due, but none was taken under load
+    assert len(busy) > 1 and set(busy) == {0}
+    assert c.active == 0
@@ -77,3 +77,141 @@ def test_interpret():
 
     assert result.exit_code == 0
     assert "Total 58/58" in result.output
+
+
+def test_run_jobs_keeps_task_order():
+    import time
+
+    def task(i):
+        # later tasks finish first
+        time.sleep((5 - i) * 0.01)
+        return i
+
+    tasks = [lambda i=i: task(i) for i in range(6)]
+    assert list(cli.run_jobs(tasks, jobs=3)) == list(range(6))
+    assert list(cli.run_jobs(tasks, jobs=3, pin=True)) == list(range(6))
+
+
+def test_buffered_report_is_flushed_once():
+    import io
+
+    r = cli.Reporter(io.StringIO())
+    assert r.buffered(False) is r
+
+    cr = r.buffered()
+    cr.output("case")
+    r.flush(cr)
+    r.flush(cr)
+    assert r.report.getvalue() == "case\n"
+
+
+def test_run_kills_process_group():
+    import subprocess
+    import sys
+    import time
+
+    from jpamb import runner
+
+    cp = runner.run(
+        [sys.executable, "-c", "print('out'); x = bytearray(50_000_000)"], logout=print
+    )
+    assert cp.stdout == "out\n"
+    assert cp.maxrss > 50_000 and cp.utime >= 0 and cp.time > 0
+
+    # the background sleep keeps the pipes open, unless the whole group is killed
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        runner.run(["sh", "-c", "sleep 30 & sleep 30"], timeout=0.2)
+    assert time.monotonic() - start < 5
+
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        runner.run([sys.executable, "-c", "print('x'); exit(3)"])
+    assert e.value.returncode == 3 and e.value.stdout == "x\n"
+
+
+def test_run_fails_on_overlong_line(monkeypatch):
+    import subprocess
+    import sys
+    import time
+
+    from jpamb import runner
+
+    monkeypatch.setattr(runner, "LINE_LIMIT", 1024)
+    # the background sleep keeps the pipes open, unless the whole group is killed
+    start = time.monotonic()
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        runner.run(
+            ["sh", "-c", f"sleep 30 & {sys.executable} -c \"print('x' * 4096)\"; sleep 30"],
+            timeout=10,
+        )
+    assert time.monotonic() - start < 5
+    assert "longer than 1024" in e.value.stderr
+
+
+def test_analyzer_server(tmp_path):
+    import sys
+
+    analyzer = tmp_path / "analyzer.py"
+    analyzer.write_text(
+        "import sys, jpamb\n"
+        "def main():\n"
+        "    print('args', *sys.argv[1:])\n"
+        "    print('note', file=sys.stderr)\n"
+        "jpamb.serve(main)\n"
+    )
+    server = cli.AnalyzerServer((sys.executable, str(analyzer)))
+    try:
+        for args in [("a.B.c:()V",), ("a.B.c:(I)V", "(1, 2)")]:
+            errors = []
+            out, _ = server.request(args, logerr=errors.append)
+            assert out == "args " + " ".join(args) + "\n"
+            assert errors == ["note"]
+    finally:
+        server.close()
+
+
+def test_in_process_analyzer(tmp_path):
+    import subprocess
+    import sys
+
+    analyzer = tmp_path / "analyzer.py"
+    analyzer.write_text(
+        "import sys, jpamb\n"
+        "print('loaded', file=sys.stderr)\n"
+        "def main():\n"
+        "    if sys.argv[1] == 'fail':\n"
+        "        sys.exit(1)\n"
+        "    print('args', *sys.argv[1:])\n"
+        "jpamb.serve(main)\n"
+    )
+    runner = cli.InProcessAnalyzer((sys.executable, str(analyzer)))
+
+    errors = []
+    assert runner.request(("a.B.c:()V",), logerr=errors.append)[0] == "args a.B.c:()V\n"
+    assert runner.request(("a.B.c:(I)V", "(1)"), logerr=errors.append)[0] == "args a.B.c:(I)V (1)\n"
+    # the script itself only runs once, later requests call the served function
+    assert errors == ["loaded"]
+    with pytest.raises(subprocess.CalledProcessError):
+        runner.request(("fail",))
+
+
+def test_read_stream_drops_incomplete_line(tmp_path):
+    stream = tmp_path / "results.jsonl"
+    a = '{"method": "a", "score": 1, "time": 10, "relative": 0.5}\n'
+    stream.write_text(a + '{"method": "b", "sc')
+    assert cli.read_stream(stream) == {"a": {"score": 1, "time": 10, "relative": 0.5}}
+    assert stream.read_text() == a
+    assert cli.read_stream(tmp_path / "missing.jsonl") == {}
+
+
+def test_read_stream_skips_invalid_lines(tmp_path):
+    stream = tmp_path / "results.jsonl"
+    stream.write_text(
+        '{"method": "old", "score": 1}\n'
+        '[1, 2]\n'
+        'not json\n'
+        '{"score": 1, "time": 10, "relative": 0.5}\n'
+        '{"method": "a", "score": 1, "time": 10, "relative": null}\n'
+        '{"method": "b", "score": -1, "time": 10, "relative": 0.5}\n'
+    )
+    assert cli.read_stream(stream) == {"b": {"score": -1, "time": 10, "relative": 0.5}}
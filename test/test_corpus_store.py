@@ -0,0 +1,29 @@
+from corpus_store import CorpusStore
+
+
+def test_round_trip(tmp_path):
+    store = CorpusStore(tmp_path, "jpamb.cases.Simple.divideByN:(I)I")
+    assert store.load() == []
+
+    store.save([((1, (2, 3)), "a", None), ((0, ()), "b", "divide by zero")])
+    assert sorted(store.load()) == [((0, ()), "b", "divide by zero"), ((1, (2, 3)), "a", None)]
+
+    # a reopened store sees the same entries
+    again = CorpusStore(tmp_path, "jpamb.cases.Simple.divideByN:(I)I")
+    assert sorted(again.load()) == sorted(store.load())
+    assert CorpusStore(tmp_path, "jpamb.cases.Simple.divideByZero:()I").load() == []
+
+
+def test_keeps_smallest_input_per_signature(tmp_path):
+    store = CorpusStore(tmp_path, "m")
+    store.save([((123456,), "a", None)])
+    store.save([((7,), "a", None), ((99999999,), "a", None), ((5,), "a", "crash")])
+    assert sorted(store.load()) == [((5,), "a", "crash"), ((7,), "a", None)]
+    assert len(list(store.path.glob("*.json"))) == 2
+
+
+def test_skips_unreadable_entries(tmp_path):
+    store = CorpusStore(tmp_path, "m")
+    store.save([((1,), "a", None)])
+    store.path.joinpath("broken.json").write_text("{")
+    assert store.load() == [((1,), "a", None)]
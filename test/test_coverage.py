@@ -0,0 +1,32 @@
+from coverage import MAP_SIZE, CoverageMap, Trace
+
+
+def run(trace, path):
+    for offset in path:
+        trace.visit("m", offset)
+    return trace.classified()
+
+
+def test_reset_clears_the_reused_trace():
+    trace = Trace()
+    first = run(trace, [0, 1, 2, 1, 2])
+    hit = trace.hit
+    assert hit and trace.steps == 5
+
+    trace.reset()
+    assert trace.edges == bytearray(MAP_SIZE)
+    assert trace.hit == [] and trace.steps == 0 and trace.prev == 0
+    # the list handed out for the last execution is left alone
+    assert hit
+
+    assert run(trace, [0, 1, 2, 1, 2]) == first
+    assert run(Trace(), [0, 3]) == run(trace.reset(), [0, 3])
+
+
+def test_edge_count_is_kept_up_to_date():
+    coverage = CoverageMap()
+    assert coverage.edge_count() == 0
+    for path in ([0, 1, 2], [0, 1, 2, 1, 2, 1, 2], [0, 3], [0, 3]):
+        coverage.update(run(Trace(), path))
+        seen = coverage.seen.to_bytes(MAP_SIZE, "little")
+        assert coverage.edge_count() == MAP_SIZE - seen.count(0)
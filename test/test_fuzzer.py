@@ -0,0 +1,112 @@
+from fuzzer import Fuzzer
+
+# a committed class, so the fuzzer has bytecode to run
+METHOD = "jpamb.cases.PositiveInteger.set:(I)V"
+
+
+def counting(fuzzer):
+    """Count the executions of `fuzzer`."""
+    runs = []
+    run = fuzzer._run
+
+    def counted(*args, **kwargs):
+        runs.append(args[0])
+        return run(*args, **kwargs)
+
+    fuzzer._run = counted
+    return runs
+
+
+def test_plateau_stops_fuzzing():
+    fuzzer = Fuzzer(METHOD, fuzz_for=100_000, plateau=50)
+    runs = counting(fuzzer)
+    fuzzer.fuzz()
+    # every new edge restarts the count of 50 executions, there are only a few
+    assert 51 <= len(runs) <= 51 * (fuzzer.coverage.edge_count() + 1)
+
+
+def test_energy_prefers_rare_fast_and_small_seeds():
+    fuzzer = Fuzzer(METHOD)
+    fuzzer.edge_freq.update({1: 100, 2: 1})
+    base = fuzzer._energy((1,), 10, 10, 10, 10)
+    assert fuzzer._energy((1, 2), 10, 10, 10, 10) > base
+    assert fuzzer._energy((1,), 5, 10, 10, 10) > base
+    assert fuzzer._energy((1,), 10, 5, 10, 10) > base
+    # speed and size count at most 4x either way
+    assert fuzzer._energy((1,), 1, 1, 1000, 1000) == 16 * base
+    assert fuzzer._energy((1,), 10_000, 10_000, 10, 10) == base / 16
+
+
+def test_crash_signature_buckets_by_faulting_frame():
+    from types import SimpleNamespace
+
+    from fuzzer import CrashBucket, crash_signature
+
+    def crash(stack, depth=1, message="divide by zero"):
+        return SimpleNamespace(message=message, depth=depth, stack=stack)
+
+    here = crash((("a", 3), ("b", 7)))
+    assert crash_signature(here) == crash_signature(crash((("a", 3), ("b", 7)), depth=5))
+    assert crash_signature(here) != crash_signature(crash((("c", 3), ("b", 7))))
+    assert crash_signature(here) != crash_signature(crash((("a", 3), ("b", 8))))
+    assert crash_signature(here) != crash_signature(crash((("a", 3), ("b", 7)), message="out of bounds"))
+    # without a stack, the depth stands in for the pc
+    assert crash_signature(crash(None, depth=4)) == ("divide by zero", "None", 4, 0)
+    assert str(CrashBucket(crash_signature(here))).startswith("divide by zero@b:7#")
+
+
+def test_crashes_are_counted_per_bucket():
+    fuzzer = Fuzzer(METHOD, fuzz_for=30, plateau=None)
+    outputs = []
+    run = fuzzer._run
+    fuzzer._run = lambda *args, **kwargs: outputs.append(run(*args, **kwargs)) or outputs[-1]
+    # nothing is deep enough to be triaged, so every execution is seed or candidate
+    fuzzer.fuzz(min_depth=10**9)
+    assert len(outputs) == 31
+    crashes = [o for o in outputs if o.message not in ("ok", "assertion error", "timeout")]
+    assert sum(b.count for b in fuzzer.crashes.values()) == len(crashes)
+    assert all(b.wrong_inputs == [] for b in fuzzer.crashes.values())
+
+
+def test_resuming_from_the_store_is_recorded(tmp_path):
+    first = Fuzzer(METHOD, fuzz_for=20, corpus_dir=tmp_path, resume_budget=5)
+    assert not first.resumed and first.fuzz_for == 20
+    first.fuzz()
+
+    again = Fuzzer(METHOD, fuzz_for=20, corpus_dir=tmp_path, resume_budget=5)
+    assert again.resumed and again.fuzz_for == 5
+    # without a store, nothing is resumed
+    assert not Fuzzer(METHOD, fuzz_for=20).resumed
+
+
+def test_guarded_first_hit_does_not_hide_the_bucket():
+    from types import SimpleNamespace
+
+    from fuzzer import MAX_TRIAGE
+
+    def crash(depth):
+        return SimpleNamespace(message="divide by zero", depth=depth, stack=(("m", 4),))
+
+    fuzzer = Fuzzer(METHOD, fuzz_for=5)
+    # with assertions enabled, the input 1 stops at an assertion (another depth)
+    fuzzer._run = lambda x, assertions_disabled=True, trace=None: crash(7 if x == (1,) else 3)
+
+    fuzzer._handle_crash((1,), crash(3), min_depth=1)
+    (bucket,) = fuzzer.crashes.values()
+    assert bucket.representative is None and fuzzer.wrong_inputs == []
+
+    fuzzer._handle_crash((2,), crash(3), min_depth=1)
+    assert bucket.count == 2 and bucket.representative is not None
+    assert len(fuzzer.wrong_inputs) == 1
+
+    # once there is a representative, further inputs are only counted
+    fuzzer._handle_crash((5,), crash(3), min_depth=1)
+    assert bucket.count == 3 and bucket.triaged == 2 and len(fuzzer.wrong_inputs) == 1
+
+    # triage is bounded per bucket
+    guarded = Fuzzer(METHOD, fuzz_for=5)
+    guarded._run = lambda x, assertions_disabled=True, trace=None: crash(7)
+    for _ in range(MAX_TRIAGE + 3):
+        guarded._handle_crash((1,), crash(3), min_depth=1)
+    (bucket,) = guarded.crashes.values()
+    assert bucket.triaged == MAX_TRIAGE and bucket.representative is None
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from jpamb import jvm
+from input_schema import Constructed, codec, decode_params
+
+PAIR = Constructed(jvm.ClassName.decode("jpamb.utils.Pair"), (jvm.Int(), jvm.Array(jvm.Int())))
+
+
+def test_decode_params():
+    assert decode_params("jpamb.cases.X.m:(I[CZLjpamb/utils/Pair<init>I[I;[[I)V") == (
+        jvm.Int(),
+        jvm.Array(jvm.Char()),
+        jvm.Boolean(),
+        PAIR,
+        jvm.Array(jvm.Array(jvm.Int())),
+    )
+    assert decode_params("I[[C") == (jvm.Int(), jvm.Array(jvm.Array(jvm.Char())))
+    assert decode_params("jpamb.cases.X.m:()V") == ()
+
+
+def test_codecs_are_shared():
+    assert codec(jvm.Array(jvm.Int())) is codec(jvm.Array(jvm.Int()))
+
+
+@pytest.mark.parametrize(
+    "t, x",
+    [
+        (jvm.Int(), -5),
+        (jvm.Boolean(), True),
+        (jvm.Char(), "q"),
+        (jvm.Array(jvm.Int()), (1, -2, 3)),
+        (jvm.Array(jvm.Char()), ("a", "b")),
+        (jvm.Array(jvm.Int()), ()),
+    ],
+)
+def test_encode_decodes_to_the_same_value(t, x):
+    c = codec(t)
+    assert jvm.Value.decode(c.encode(x)) == [c.to_value(x)]
+
+
+def test_constructor_arguments_are_boxed():
+    value = codec(PAIR).to_value((3, (1, 2)))
+    assert value.type == jvm.Object(PAIR.classname)
+    n, xs = value.value["value"]
+    assert n == jvm.Value.int(3)
+    assert xs == jvm.Value.array(jvm.Int(), [jvm.Value.int(1), jvm.Value.int(2)])
+
+
+def test_from_raw_drops_tags():
+    assert codec(jvm.Array(jvm.Char())).from_raw(["C", "a", "b"]) == ("a", "b")
+    assert codec(PAIR).from_raw(["jpamb/utils/Pair", 3, ["I", 1, 2]]) == (3, (1, 2))
+    assert codec(PAIR).from_raw((3, (1, 2))) == (3, (1, 2))
+
+
+@pytest.mark.parametrize("t", [jvm.Int(), jvm.Char(), jvm.Boolean(), jvm.Array(jvm.Int()), PAIR])
+def test_generated_and_mutated_values_stay_in_the_schema(t):
+    c, rng = codec(t), random.Random(0)
+    x = c.generate(rng)
+    for _ in range(50):
+        x = c.havoc(c.deterministic(x, rng, [0, 1, 65]), rng, [0, 1, 65])
+        c.to_value(x)
+    assert type(x) is type(c.default())
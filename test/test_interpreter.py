@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import jpamb
+from jpamb import jvm
+from jpamb.model import Input
+
+import interpreter
+
+METHOD = jvm.AbsMethodID.decode("jpamb.cases.Demo.obj:(Ljpamb/cases/PositiveInteger<init>I;I)I")
+POSITIVE = jvm.ClassName.decode("jpamb/cases/PositiveInteger")
+CONSTRUCTOR = jvm.intern(
+    jvm.AbsMethodID(POSITIVE, jvm.MethodID("<init>", jvm.ParameterType((jvm.Int(),)), None))
+)
+
+
+def bytecode(constructor):
+    # the constructor is given directly, instead of being read from the decompiled class
+    suite = jpamb.Suite(Path(__file__).parent.parent.resolve())
+    return interpreter.Bytecode(suite, {CONSTRUCTOR: constructor})
+
+
+def initial_heap(constructor, value):
+    inputs = Input((jvm.Value.object({"value": [jvm.Value.int(value)]}, POSITIVE), jvm.Value.int(1)))
+    return interpreter.generate_initial_state(METHOD, inputs, bytecode(constructor)).heap
+
+
+def test_throwing_constructor_is_not_cached():
+    interpreter._CONSTRUCTED.clear()
+    divide_by_zero = [
+        jvm.Push(offset=0, value=jvm.Value.int(1)),
+        jvm.Push(offset=1, value=jvm.Value.int(0)),
+        jvm.Binary(offset=2, type=jvm.Int(), operant=jvm.BinaryOpr.Div),
+        jvm.Return(offset=3, type=None),
+    ]
+    first = initial_heap(divide_by_zero, -7)
+    assert not interpreter._CONSTRUCTED
+    assert initial_heap(divide_by_zero, -7) == first
+
+
+def test_returning_constructor_is_cached():
+    interpreter._CONSTRUCTED.clear()
+    first = initial_heap([jvm.Return(offset=0, type=None)], 7)
+    assert len(interpreter._CONSTRUCTED) == 1
+    assert initial_heap([jvm.Return(offset=0, type=None)], 7) == first
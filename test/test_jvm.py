@@ -1,3 +1,5 @@
+import pytest
+
 from jpamb import jvm
 
 from hypothesis import given, strategies as st
@@ -14,6 +16,56 @@ def test_singletons():
     assert jvm.Array(jvm.Boolean()) is not jvm.Array(jvm.Int())
 
 
+def test_opcode_from_json_interns():
+    invoke = {
+        "offset": 3,
+        "opr": "invoke",
+        "access": "static",
+        "method": {
+            "ref": {"kind": "class", "name": "jpamb/cases/Simple"},
+            "name": "assertPositive",
+            "args": ["int"],
+            "returns": None,
+        },
+    }
+    a = jvm.Opcode.from_json(invoke)
+    b = jvm.Opcode.from_json(invoke | {"offset": 7})
+    assert isinstance(a, jvm.InvokeStatic)
+    assert a.method is b.method
+    assert a.method.extension == jvm.MethodID.decode("assertPositive:(I)V")
+    assert jvm.ClassName.decode("a.B") is jvm.ClassName.decode("a.B")
+
+
+def test_decode_interns():
+    mid = "jpamb.cases.Simple.f:(I[CLjpamb/utils/PositiveInteger<init>I;)I"
+    a = jvm.AbsMethodID.decode(mid)
+    assert a is jvm.AbsMethodID.decode(mid)
+    assert a.extension is jvm.MethodID.decode("f:(I[CLjpamb/utils/PositiveInteger<init>I;)I")
+    assert a.classname is jvm.ClassName.decode("jpamb.cases.Simple")
+    assert jvm.FieldID.decode("x:[I") is jvm.FieldID.decode("x:[I")
+    assert jvm.AbsFieldID.decode("a.B.x:I") is jvm.AbsFieldID.decode("a.B.x:I")
+    # built by hand, the interned instance is the decoded one
+    built = jvm.AbsMethodID(a.classname, jvm.MethodID(a.extension.name, a.extension.params, jvm.Int()))
+    assert jvm.intern(built) is a
+    assert {a: 1}[built] == 1
+
+
+def test_cached_hash_not_pickled():
+    import pickle
+
+    mid = jvm.AbsMethodID.decode("jpamb.cases.Simple.g:(IC)V")
+    hash(mid)
+    assert "_hash" not in pickle.loads(pickle.dumps(mid)).__dict__
+
+
+def test_opcode_checked_mode(monkeypatch):
+    monkeypatch.setattr(jvm.opcode, "CHECKED", False)
+    jvm.Goto(offset=1, target="5")
+    monkeypatch.setattr(jvm.opcode, "CHECKED", True)
+    with pytest.raises(AssertionError):
+        jvm.Goto(offset=1, target="5")
+
+
 def test_value_parser():
 
     assert jvm.ValueParser.parse("1, 's', [I:10, 32]") == [
@@ -23,6 +75,35 @@ def test_value_parser():
     ]
 
 
+@pytest.mark.parametrize(
+    "input",
+    ["(1, -2)", "()", "('a', ' ', ',')", "(true, 5, 'x')", "([I:1, 2], 3)", "(1,)", "(1 2)", "('ab')"],
+)
+def test_value_parser_fast_path(input):
+    def tokenized(input):
+        vp = jvm.ValueParser(input)
+        values = vp.parse_comma_seperated_values()
+        vp.eof()
+        return values
+
+    try:
+        expected = tokenized(input)
+    except ValueError:
+        with pytest.raises(ValueError):
+            jvm.Value.decode_many(input)
+    else:
+        assert jvm.Value.decode_many(input) == expected
+
+
+def test_input_decode_cached():
+    from jpamb.model import Input
+
+    assert Input.decode("(1, 'a')") is Input.decode("(1, 'a')")
+    obj = "(new jpamb/utils/PositiveInteger(2), 3)"
+    assert Input.decode(obj) is not Input.decode(obj)
+    assert Input.decode(obj) == Input.decode(obj)
+
+
 def jvm_classnames():
     return st.sampled_from(["java.lang.Object", "a.simple.ClassName"]).map(
         jvm.ClassName.decode
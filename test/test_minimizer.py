@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from jpamb import jvm
+from input_schema import Constructed
+from minimizer import Minimizer, minimize
+
+
+def outcome(message, depth=1):
+    return SimpleNamespace(message=message, depth=depth)
+
+
+def test_ddmin_keeps_the_elements_that_matter():
+    # fails while the array still holds both 3 and 7
+    def run(x):
+        (xs,) = x
+        return outcome("out of bounds" if 3 in xs and 7 in xs else "ok")
+
+    xs = tuple(range(20))
+    assert minimize((xs,), (jvm.Array(jvm.Int()),), run) == ((3, 7),)
+
+
+def test_shrinks_every_kind_of_field():
+    params = (jvm.Int(), jvm.Int(), jvm.Char(), jvm.Boolean(), Constructed(jvm.ClassName.decode("a/B"), (jvm.Int(),)))
+
+    def run(x):
+        n, m, _, _, (k,) = x
+        return outcome("divide by zero" if n >= 17 and m < 0 and k != 0 else "ok")
+
+    assert minimize((1000, -50, "z", True, (-9,)), params, run) == (17, -1, "a", False, (-1,))
+
+
+def test_needs_the_same_message_and_depth():
+    def run(x):
+        (n,) = x
+        return outcome("divide by zero", depth=1 if n > 10 else 2)
+
+    assert minimize((100,), (jvm.Int(),), run) == (11,)
+
+
+def test_budget_bounds_the_executions():
+    runs = []
+
+    def run(x):
+        runs.append(x)
+        (xs,) = x
+        return outcome("divide by zero" if sum(xs) >= 1000 else "ok")
+
+    minimizer = Minimizer((jvm.Array(jvm.Int()),), run, budget=5)
+    smallest = minimizer.minimize((tuple(range(1, 100)),))
+    # the initial run is not counted, the best input found so far is returned
+    assert minimizer.executions == 5 and len(runs) == 6
+    assert sum(smallest[0]) >= 1000 and len(smallest[0]) < 99
@@ -0,0 +1,104 @@
+from itertools import islice
+
+import tree_sitter
+import tree_sitter_java
+import z3
+
+from solver import AssertSolver
+from solver.solver import INT_MAX
+
+JAVA = tree_sitter.Language(tree_sitter_java.language())
+
+
+def asserts(*sources: str):
+    """The `assert` statement nodes of a method with the given body statements."""
+    code = "class A { void m() { " + " ".join(sources) + " } }"
+    tree = tree_sitter.Parser(JAVA).parse(code.encode())
+    found, stack = [], [tree.root_node]
+    while stack:
+        node = stack.pop()
+        if node.type == "assert_statement":
+            found.append(node)
+        stack.extend(reversed(node.children))
+    return found
+
+
+def values(result, *names):
+    return tuple(result.model.evaluate(result.variables[n], model_completion=True).as_long() for n in names)
+
+
+def test_solve_each_continues_after_the_batch_model():
+    solver = AssertSolver(asserts("assert x > 5 && x < 10;", "assert y != 0;"), {"x": "int", "y": "int"})
+    first, second = solver.solve_each()
+    assert first.status == z3.sat and not first.contradiction
+
+    more = [values(r, "x") for r in islice(first.models, 5)]
+    # the batch model is not repeated, and the models are told apart by x alone
+    assert values(first, "x") not in more
+    assert len(set(more)) == 5
+
+    # y == 0 is the only counterexample of the second assertion: the blocking
+    # clauses of the first one do not exclude it
+    assert values(second, "y") == (0,)
+    assert next(second.models, None) is None
+
+
+def test_solve_each_tautology_and_contradiction():
+    tautology, contradiction = AssertSolver(
+        asserts("assert c >= 0;", "assert x > 0 && x < 0;"), {"c": "char", "x": "int"}
+    ).solve_each()
+    assert tautology.status == z3.unsat and tautology.models is None
+    assert "domain:c" in tautology.core
+    assert contradiction.contradiction and contradiction.models is None
+    assert "holds:1" in contradiction.core
+
+
+def test_iter_models_are_distinct():
+    solver = AssertSolver(asserts("assert x + y < 3;"))
+    models = [values(r, "x", "y") for r in islice(solver.iter_models(), 10)]
+    assert len(models) == 10 and len(set(models)) == 10
+    assert all(x + y >= 3 for x, y in models)
+
+
+def test_iter_models_ends_when_exhausted():
+    # x == 0 is the only model of the negation
+    results = list(AssertSolver(asserts("assert x != 0;")).iter_models())
+    assert [r.status for r in results] == [z3.sat]
+    assert values(results[0], "x") == (0,)
+
+    (tautology,) = AssertSolver(asserts("assert x == x;")).iter_models()
+    assert tautology.status == z3.unsat and tautology.model is None
+
+
+def diverse(seed, count=12):
+    solver = AssertSolver(asserts("assert x < 100;"), sampling="diverse", seed=seed)
+    return [values(r, "x") for r in islice(solver.iter_models(), count)]
+
+
+def test_diverse_models_are_spread_and_distinct():
+    models = diverse(seed=1)
+    assert len(set(models)) == len(models) == 12
+    assert all(100 <= x <= INT_MAX for (x,) in models)
+    # boundary values and extremes come before the random phase
+    assert (INT_MAX,) in models[:3] and (100,) in models[:3]
+
+
+def test_diverse_models_are_reproducible_by_seed():
+    assert diverse(seed=7) == diverse(seed=7)
+    assert diverse(seed=7) != diverse(seed=8)
+
+
+def test_translations_are_cached_by_text_and_types():
+    import pickle
+
+    from solver import utils
+
+    first, second = asserts("assert n / 2 != c;", "assert n / 2 != c;")
+    types = {"n": "int", "c": "char"}
+    expr = utils.compile_expression(first.children[1], types)
+    # the same text in another statement is a cache hit
+    assert utils.compile_expression(second.children[1], types) is expr
+    # other variable types are not
+    assert utils.compile_expression(second.children[1], {"n": "int"}) != expr
+    assert pickle.loads(pickle.dumps(expr)) == expr
+    assert utils.expression_variables(expr) == ["n", "c"]